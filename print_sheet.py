@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from process_photo import LayoutSpec, build_front_back_sheet, build_print_sheet, parse_layout
+from process_photo import LayoutSpec, build_front_back_sheet, build_print_sheet, build_print_sheet_array, parse_layout
 
 
 VERY_LIGHT_GUIDE_COLORS = {
@@ -17,5 +17,6 @@ __all__ = [
     "VERY_LIGHT_GUIDE_COLORS",
     "build_front_back_sheet",
     "build_print_sheet",
+    "build_print_sheet_array",
     "parse_layout",
 ]
@@ -4,12 +4,16 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import functools
 import json
 import math
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
@@ -20,37 +24,38 @@ except ImportError as exc:  # pragma: no cover - handled by runtime env
     raise SystemExit("OpenCV is required. Install dependencies from requirements.txt") from exc
 
 try:
-    import mediapipe as mp
-except ImportError:  # pragma: no cover - optional
-    mp = None
-
-try:
-    from rembg import new_session as rembg_new_session
-    from rembg import remove as rembg_remove
-except ImportError:  # pragma: no cover - optional high-quality backend
-    rembg_new_session = None
-    rembg_remove = None
-
-try:
-    import torch
-    import torch.nn.functional as torch_f
-    from torchvision import transforms as torch_transforms
-    from transformers import AutoModelForImageSegmentation
-except ImportError:  # pragma: no cover - optional best-quality backend
-    torch = None
-    torch_f = None
-    torch_transforms = None
-    AutoModelForImageSegmentation = None
+    import orjson
+except ImportError:  # pragma: no cover - optional faster JSON parser
+    orjson = None
 
 _selfie_segmenter = None
+# A MediaPipe solution graph is not safe to drive from several threads (Streamlit
+# sessions), so creation and process() calls on the shared segmenter are serialized.
+_selfie_segmenter_lock = threading.Lock()
+# (detector, image module) once created, or False once found unavailable, so a
+# missing mediapipe install or model file is probed once rather than per call.
 _mp_face_detector = None
+# Same serialization as the segmenter: MediaPipe task graphs are not documented
+# as thread-safe, and concurrent first calls must not each build a detector.
+_mp_face_detector_lock = threading.Lock()
+_face_cascade = threading.local()
 _birefnet_model = None
 _birefnet_device = None
 _birefnet_transform = None
 _rembg_sessions: Dict[str, object] = {}
+_head_fill_executor: Optional[ThreadPoolExecutor] = None
+_head_fill_executor_lock = threading.Lock()
 
+# Long-edge size (px) the Haar fallback detects on; larger inputs are downscaled.
+_HAAR_MAX_SIDE = 640
+# Long-edge size (px) the GrabCut fallback segments at; the mask is upsampled back.
+_GRABCUT_MAX_SIDE = 512
+# Maps GrabCut labels to a 0/255 mask (GC_FGD/GC_PR_FGD -> 255) in one cv2.LUT pass.
+_GRABCUT_FG_LUT = np.zeros(256, dtype=np.uint8)
+_GRABCUT_FG_LUT[[cv2.GC_FGD, cv2.GC_PR_FGD]] = 255
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class PhotoSpec:
     name: str
     width_in: float
@@ -61,14 +66,15 @@ class PhotoSpec:
     top_margin_ratio: float
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LayoutSpec:
     width_in: float
     height_in: float
 
 
 def load_specs(path: Path) -> Dict[str, PhotoSpec]:
-    data = json.loads(path.read_text())
+    raw = path.read_bytes()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
     specs: Dict[str, PhotoSpec] = {}
     for key, value in data.items():
         width_in = value.get("photo_width_in")
@@ -96,12 +102,20 @@ def detect_face(image_bgr: np.ndarray) -> Tuple[Tuple[int, int, int, int], Tuple
     if mp_detector is not None:
         try:
             detector, mp_image_mod = mp_detector
-            image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+            # The detector resizes to its own small input internally, so hand it
+            # the same capped copy the Haar path uses and scale the box back.
+            img_h, img_w = image_bgr.shape[:2]
+            mp_scale = min(1.0, _HAAR_MAX_SIDE / max(img_h, img_w))
+            small_bgr = image_bgr
+            if mp_scale < 1.0:
+                small_bgr = cv2.resize(image_bgr, None, fx=mp_scale, fy=mp_scale, interpolation=cv2.INTER_AREA)
+            image_rgb = cv2.cvtColor(small_bgr, cv2.COLOR_BGR2RGB)
             mp_image = mp_image_mod.Image(
                 image_format=mp_image_mod.ImageFormat.SRGB,
                 data=image_rgb,
             )
-            result = detector.detect(mp_image)
+            with _mp_face_detector_lock:
+                result = detector.detect(mp_image)
             detections = getattr(result, "detections", None) or []
             if detections:
                 def score(d):
@@ -111,7 +125,10 @@ def detect_face(image_bgr: np.ndarray) -> Tuple[Tuple[int, int, int, int], Tuple
                         return 0.0
                 det = max(detections, key=score)
                 bbox = det.bounding_box
-                x, y, w, h = int(bbox.origin_x), int(bbox.origin_y), int(bbox.width), int(bbox.height)
+                x, y, w, h = (
+                    int(round(v / mp_scale))
+                    for v in (bbox.origin_x, bbox.origin_y, bbox.width, bbox.height)
+                )
                 eye_x = x + w // 2
                 eye_y = y + int(h * 0.35)
                 return (x, y, w, h), (eye_x, eye_y)
@@ -120,23 +137,42 @@ def detect_face(image_bgr: np.ndarray) -> Tuple[Tuple[int, int, int, int], Tuple
 
     """Detect face using OpenCV cascade classifier (fallback)."""
     
-    # Load OpenCV cascade classifier
-    cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-    cascade = cv2.CascadeClassifier(cascade_path)
+    cascade = _get_face_cascade()
     
-    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
-    # Use conservative parameters that work well with both synthetic and real photos
-    faces = cascade.detectMultiScale(gray, scaleFactor=1.01, minNeighbors=3, minSize=(30, 30))
+    # The full-size gray frame is transient (it is downscaled or consumed by the
+    # cascade below), so convert into a reused per-thread scratch buffer.
+    img_h, img_w = image_bgr.shape[:2]
+    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY, dst=_scratch.get("haar_gray", (img_h, img_w), np.uint8))
+    # Cascade cost grows with pixel count, so detect on a copy capped at
+    # _HAAR_MAX_SIDE on the long edge and map the box back afterwards.
+    scale = min(1.0, _HAAR_MAX_SIDE / max(img_h, img_w))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    # Use conservative parameters that work well with both synthetic and real photos.
+    # An ID photo's face spans a good share of the frame, so bound the search
+    # window to 10-90% of the short edge and skip the pyramid levels outside it.
+    short_side = min(gray.shape[:2])
+    min_side = max(30, short_side // 10)
+    max_side = max(min_side, int(short_side * 0.9))
+    faces = _haar_detect(
+        cascade,
+        gray,
+        scaleFactor=1.1,
+        minNeighbors=3,
+        minSize=(min_side, min_side),
+        maxSize=(max_side, max_side),
+    )
     
     if len(faces) == 0:
-        # Try more lenient parameters
-        faces = cascade.detectMultiScale(gray, scaleFactor=1.05, minNeighbors=2, minSize=(20, 20))
+        # Try more lenient parameters (full scale range)
+        faces = _haar_detect(cascade, gray, scaleFactor=1.05, minNeighbors=2, minSize=(20, 20))
     
     if len(faces) == 0:
         raise RuntimeError("No face detected. Please use a clearer, front-facing photo.")
     
     # Get largest face
-    (x, y, w, h) = max(faces, key=lambda f: f[2] * f[3])
+    (x, y, w, h) = (int(round(v / scale)) for v in max(faces, key=lambda f: f[2] * f[3]))
     
     # Estimate eye position (roughly 1/3 from top of face)
     eye_x = x + w // 2
@@ -145,11 +181,58 @@ def detect_face(image_bgr: np.ndarray) -> Tuple[Tuple[int, int, int, int], Tuple
     return (x, y, w, h), (eye_x, eye_y)
 
 
+def _get_face_cascade():
+    cascade = getattr(_face_cascade, "cascade", None)
+    if cascade is None:
+        # Parsing the cascade XML costs tens of ms, so load it once; keep one per
+        # thread since detectMultiScale on a shared classifier isn't thread-safe
+        # (Streamlit runs each session's script on its own thread).
+        cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        cascade = cv2.CascadeClassifier(cascade_path)
+        _face_cascade.cascade = cascade
+    return cascade
+
+
+@functools.lru_cache(maxsize=None)
+def _import_mediapipe():
+    """Import mediapipe on first use; its TFLite/absl init adds seconds to startup.
+
+    Cached so a missing install is only probed once per process.
+    """
+    try:
+        import mediapipe as mp
+    except ImportError:  # pragma: no cover - optional
+        return None
+    return mp
+
+
+def _haar_detect(cascade, gray: np.ndarray, **params) -> np.ndarray:
+    """Run detectMultiScale, optionally through OpenCV's OpenCL (T-API) path.
+
+    Opt in with IDPHOTO_HAAR_OPENCL=1. Some OpenCL drivers return no detections,
+    so an empty or failed GPU run falls back to the CPU.
+    """
+    if os.environ.get("IDPHOTO_HAAR_OPENCL") == "1" and cv2.ocl.haveOpenCL():
+        try:
+            faces = cascade.detectMultiScale(cv2.UMat(gray), **params)
+            if len(faces) > 0:
+                return faces
+        except cv2.error:
+            pass
+    return cascade.detectMultiScale(gray, **params)
+
+
 def _get_mp_face_detector():
     global _mp_face_detector
-    if _mp_face_detector is not None:
-        return _mp_face_detector
-    if mp is None:
+    if _mp_face_detector is None:
+        with _mp_face_detector_lock:
+            if _mp_face_detector is None:
+                _mp_face_detector = _create_mp_face_detector() or False
+    return _mp_face_detector or None
+
+
+def _create_mp_face_detector():
+    if _import_mediapipe() is None:
         return None
     try:
         from mediapipe.tasks.python import vision as mp_vision
@@ -185,14 +268,14 @@ def _get_mp_face_detector():
         detector = mp_vision.FaceDetector.create_from_options(options)
     except Exception:
         return None
-    _mp_face_detector = (detector, mp_image_mod)
-    return _mp_face_detector
+    return detector, mp_image_mod
 
 
-def _foreground_mask_hsv(image_bgr: np.ndarray) -> np.ndarray:
+def _foreground_mask_hsv(image_bgr: np.ndarray, hsv: Optional[np.ndarray] = None) -> np.ndarray:
     """Fallback foreground mask using simple color-based segmentation."""
     # Convert to HSV for better skin detection
-    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+    if hsv is None:
+        hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
     
     # Skin color range in HSV (very basic)
     lower_skin = np.array([0, 20, 70], dtype=np.uint8)
@@ -203,34 +286,97 @@ def _foreground_mask_hsv(image_bgr: np.ndarray) -> np.ndarray:
     kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
     mask = cv2.dilate(mask, kernel, iterations=2)
     mask = cv2.erode(mask, kernel, iterations=1)
-    
-    return (mask > 128).astype(np.uint8) * 255
+    # inRange output is 0/255 and stays binary through dilate/erode, so no
+    # re-threshold pass is needed.
+    return mask
 
 
 def _border_stats(image_bgr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     h, w = image_bgr.shape[:2]
-    border = np.concatenate(
-        [
-            image_bgr[0:5, :, :].reshape(-1, 3),
-            image_bgr[h - 5 : h, :, :].reshape(-1, 3),
-            image_bgr[:, 0:5, :].reshape(-1, 3),
-            image_bgr[:, w - 5 : w, :].reshape(-1, 3),
-        ],
-        axis=0,
+    strips = (
+        image_bgr[0:5, :, :],
+        image_bgr[h - 5 : h, :, :],
+        image_bgr[:, 0:5, :],
+        image_bgr[:, w - 5 : w, :],
     )
-    mean = np.mean(border, axis=0)
-    std = np.std(border, axis=0)
+    # Accumulate per-strip sums instead of concatenating the strips into one
+    # buffer; mean/std then follow from E[X] and E[X^2] - E[X]^2.
+    count = 0
+    total = np.zeros(3, dtype=np.float64)
+    total_sq = np.zeros(3, dtype=np.float64)
+    for strip in strips:
+        pixels = strip.reshape(-1, 3).astype(np.float64)
+        count += pixels.shape[0]
+        total += pixels.sum(axis=0)
+        total_sq += np.einsum("ij,ij->j", pixels, pixels)
+    mean = total / count
+    std = np.sqrt(np.maximum(total_sq / count - mean * mean, 0.0))
     return mean, std
 
 
+class _ScratchBuffers(threading.local):
+    """Per-thread, grow-only scratch arrays reused across mask attempts and images.
+
+    Streamlit serves sessions from threads of one process, so buffers are kept
+    thread-local. A returned array is only valid until the next ``get`` of the
+    same name on the same thread; callers must consume it before that.
+    """
+
+    def __init__(self) -> None:
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype: type) -> np.ndarray:
+        size = int(np.prod(shape))
+        flat = self._buffers.get(name)
+        if flat is None or flat.dtype != dtype or flat.size < size:
+            flat = np.empty(size, dtype=dtype)
+            self._buffers[name] = flat
+        return flat[:size].reshape(shape)
+
+
+_scratch = _ScratchBuffers()
+
+
+def _squared_color_distance(image_bgr: np.ndarray, color: np.ndarray) -> np.ndarray:
+    """Per-pixel squared Euclidean distance to ``color`` in integer arithmetic.
+
+    Callers compare against a squared threshold, which skips the float32 copies
+    and the sqrt that ``np.linalg.norm`` would need. The result lives in a scratch
+    buffer and is overwritten by the next call on the same thread.
+    """
+    diff = _scratch.get("color_diff", image_bgr.shape, np.int16)
+    np.subtract(image_bgr, np.round(color).astype(np.int16), out=diff)
+    dist_sq = _scratch.get("color_dist_sq", image_bgr.shape[:2], np.int32)
+    return np.einsum("ijk,ijk->ij", diff, diff, dtype=np.int32, out=dist_sq)
+
+
+@functools.lru_cache(maxsize=None)
+def _import_torch():
+    """Import torch/torchvision/transformers on first BiRefNet use.
+
+    Together they take seconds to import, which every CLI run and Streamlit
+    worker paid at startup even when the engine was disabled or never reached.
+    """
+    try:
+        import torch
+        import torch.nn.functional as torch_f
+        from torchvision import transforms as torch_transforms
+        from transformers import AutoModelForImageSegmentation
+    except ImportError:  # pragma: no cover - optional best-quality backend
+        return None
+    return torch, torch_f, torch_transforms, AutoModelForImageSegmentation
+
+
 def _get_birefnet_model():
     global _birefnet_model, _birefnet_device, _birefnet_transform
     if os.environ.get("IDPHOTO_DISABLE_BIREFNET") == "1":
         return None
-    if torch is None or torch_f is None or torch_transforms is None or AutoModelForImageSegmentation is None:
-        return None
     if _birefnet_model is not None:
         return _birefnet_model, _birefnet_device, _birefnet_transform
+    torch_modules = _import_torch()
+    if torch_modules is None:
+        return None
+    torch, _, torch_transforms, AutoModelForImageSegmentation = torch_modules
 
     model_name = os.environ.get("IDPHOTO_BIREFNET_MODEL", "ZhengPeng7/BiRefNet-portrait")
     input_size = int(os.environ.get("IDPHOTO_BIREFNET_SIZE", "1024"))
@@ -270,6 +416,7 @@ def _birefnet_alpha_mask(
         return None
 
     model, device, transform = backend
+    torch, torch_f, _, _ = _import_torch()
     try:
         image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
         pil_image = Image.fromarray(image_rgb)
@@ -292,21 +439,32 @@ def _birefnet_alpha_mask(
     except Exception:
         return None
 
-    if not _mask_is_usable((alpha > 16).astype(np.uint8) * 255, face_bbox):
+    if not _mask_is_usable(cv2.threshold(alpha, 16, 255, cv2.THRESH_BINARY)[1], face_bbox):
         return None
     return _sharpen_alpha_edges(alpha)
 
 
+@functools.lru_cache(maxsize=None)
+def _import_rembg():
+    """Import rembg (and with it onnxruntime) on first use; returns None if missing."""
+    try:
+        from rembg import new_session, remove
+    except ImportError:  # pragma: no cover - optional high-quality backend
+        return None
+    return new_session, remove
+
+
 def _get_rembg_session(model_name: Optional[str] = None):
     if os.environ.get("IDPHOTO_DISABLE_REMBG") == "1":
         return None
-    if rembg_new_session is None:
+    rembg = _import_rembg()
+    if rembg is None:
         return None
 
     model = model_name or os.environ.get("IDPHOTO_REMBG_MODEL", "u2net_human_seg")
     if model not in _rembg_sessions:
         try:
-            _rembg_sessions[model] = rembg_new_session(model)
+            _rembg_sessions[model] = rembg[0](model)
         except Exception:
             return None
     return _rembg_sessions[model]
@@ -318,12 +476,10 @@ def _rembg_alpha_mask(
     model_name: Optional[str] = None,
 ) -> Optional[np.ndarray]:
     """Return a soft foreground alpha mask from rembg, or None if unavailable."""
-    if rembg_remove is None:
-        return None
-
     session = _get_rembg_session(model_name)
     if session is None:
         return None
+    _, rembg_remove = _import_rembg()
 
     try:
         image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
@@ -342,7 +498,7 @@ def _rembg_alpha_mask(
         return None
 
     alpha = rgba[:, :, 3].astype(np.uint8)
-    if not _mask_is_usable((alpha > 16).astype(np.uint8) * 255, face_bbox):
+    if not _mask_is_usable(cv2.threshold(alpha, 16, 255, cv2.THRESH_BINARY)[1], face_bbox):
         return None
     return _sharpen_alpha_edges(alpha)
 
@@ -356,31 +512,66 @@ def _sharpen_alpha_edges(alpha: np.ndarray) -> np.ndarray:
     return cv2.medianBlur(sharpened, 3)
 
 
+def _border_connected_region(candidate: np.ndarray) -> Optional[np.ndarray]:
+    """Return the 8-connected parts of a 0/255 candidate mask that touch the image border.
+
+    The candidate is wrapped in a one-pixel ring of 255 and flood-filled from that
+    ring, which reaches exactly the regions that touch the border without building
+    a full label image. Returns None when no candidate pixel touches the border.
+    """
+    h, w = candidate.shape[:2]
+    # One pass over the four edge strips decides the empty case without filling.
+    border = np.concatenate((candidate[0], candidate[-1], candidate[:, 0], candidate[:, -1]))
+    if not border.any():
+        return None
+    padded = cv2.copyMakeBorder(candidate, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=255)
+    fill_mask = np.zeros((h + 4, w + 4), dtype=np.uint8)
+    cv2.floodFill(
+        padded,
+        fill_mask,
+        (0, 0),
+        255,
+        loDiff=0,
+        upDiff=0,
+        flags=8 | cv2.FLOODFILL_MASK_ONLY | (255 << 8),
+    )
+    return fill_mask[2 : h + 2, 2 : w + 2]
+
+
 def _white_key_mask(image_bgr: np.ndarray, bg_tolerance: float) -> Optional[np.ndarray]:
     mean, std = _border_stats(image_bgr)
     if float(np.mean(mean)) < (180 - max(0.0, bg_tolerance - 25.0)) or float(np.mean(std)) > 40:
         return None
-    diff = np.linalg.norm(image_bgr.astype(np.float32) - mean.astype(np.float32), axis=2)
-    bg = diff < max(10.0, bg_tolerance)
-    fg_mask = (~bg).astype(np.uint8) * 255
+    dist_sq = _squared_color_distance(image_bgr, mean)
+    fg_mask = cv2.compare(dist_sq, max(10.0, bg_tolerance) ** 2, cv2.CMP_GE)
     fg_mask = cv2.medianBlur(fg_mask, 5)
     return fg_mask
 
 
-def _white_bg_heuristic(image_bgr: np.ndarray, bg_tolerance: float) -> np.ndarray:
+def _white_bg_heuristic(
+    image_bgr: np.ndarray,
+    bg_tolerance: float,
+    hsv: Optional[np.ndarray] = None,
+) -> np.ndarray:
     """Aggressive white-background keying using HSV thresholds."""
-    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
-    h, s, v = cv2.split(hsv)
+    if hsv is None:
+        hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
     # Background if bright and low saturation
     v_thresh = int(max(180, 255 - bg_tolerance * 1.5))
     s_thresh = int(min(60, max(20, bg_tolerance)))
-    bg = (v > v_thresh) & (s < s_thresh)
-    fg_mask = (~bg).astype(np.uint8) * 255
+    # One fused pass over the packed HSV image; the +1/-1 keep the strict
+    # v > v_thresh and s < s_thresh comparisons (inRange bounds are inclusive).
+    bg = cv2.inRange(hsv, (0, 0, v_thresh + 1), (255, s_thresh - 1, 255))
+    fg_mask = cv2.bitwise_not(bg)
     fg_mask = cv2.medianBlur(fg_mask, 5)
     return fg_mask
 
 
-def _border_color_key_mask(image_bgr: np.ndarray, bg_tolerance: float) -> Optional[np.ndarray]:
+def _border_color_key_mask(
+    image_bgr: np.ndarray,
+    bg_tolerance: float,
+    hsv: Optional[np.ndarray] = None,
+) -> Optional[np.ndarray]:
     """Key out a uniform background color by keeping only border-connected regions."""
     mean, std = _border_stats(image_bgr)
     mean_std = float(np.mean(std))
@@ -388,44 +579,36 @@ def _border_color_key_mask(image_bgr: np.ndarray, bg_tolerance: float) -> Option
     if mean_std > 45:
         return None
 
-    image_float = image_bgr.astype(np.float32)
-    diff = np.linalg.norm(image_float - mean.astype(np.float32), axis=2)
+    dist_sq = _squared_color_distance(image_bgr, mean)
     thresh = max(10.0, bg_tolerance) + 1.5 * mean_std
-    bg_candidate = (diff < thresh).astype(np.uint8) * 255
+    bg_candidate = cv2.compare(dist_sq, thresh * thresh, cv2.CMP_LT)
 
     # Light walls often cast gray shadows behind the head. Treat connected,
     # low-saturation, reasonably bright areas as background even when darker
     # than the border mean, but leave dark hair/clothing to segmentation.
-    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
-    _, sat, val = cv2.split(hsv)
     border_brightness = float(np.mean(mean))
     if border_brightness > 150:
+        if hsv is None:
+            hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+        _, sat, val = cv2.split(hsv)
         shadow_bg = (sat < 65) & (val > max(105, border_brightness - 95))
         bg_candidate = cv2.bitwise_or(bg_candidate, shadow_bg.astype(np.uint8) * 255)
 
     # Keep only background regions connected to the border.
-    num_labels, labels = cv2.connectedComponents(bg_candidate)
-    if num_labels <= 1:
+    bg_mask = _border_connected_region(bg_candidate)
+    if bg_mask is None:
         return None
 
-    border_labels = set()
-    h, w = labels.shape
-    border_labels.update(np.unique(labels[0, :]).tolist())
-    border_labels.update(np.unique(labels[h - 1, :]).tolist())
-    border_labels.update(np.unique(labels[:, 0]).tolist())
-    border_labels.update(np.unique(labels[:, w - 1]).tolist())
-    border_labels.discard(0)
-
-    if not border_labels:
-        return None
-
-    bg_mask = np.isin(labels, list(border_labels))
-    fg_mask = (~bg_mask).astype(np.uint8) * 255
+    fg_mask = cv2.bitwise_not(bg_mask)
     fg_mask = cv2.medianBlur(fg_mask, 5)
     return fg_mask
 
 
-def _border_connected_light_background_mask(image_bgr: np.ndarray, bg_tolerance: float) -> Optional[np.ndarray]:
+def _border_connected_light_background_mask(
+    image_bgr: np.ndarray,
+    bg_tolerance: float,
+    hsv: Optional[np.ndarray] = None,
+) -> Optional[np.ndarray]:
     """Return background-like light wall/shadow pixels connected to the image border."""
     mean, std = _border_stats(image_bgr)
     mean_std = float(np.mean(std))
@@ -433,14 +616,14 @@ def _border_connected_light_background_mask(image_bgr: np.ndarray, bg_tolerance:
     if border_brightness < 135 or mean_std > 60:
         return None
 
-    image_float = image_bgr.astype(np.float32)
-    diff = np.linalg.norm(image_float - mean.astype(np.float32), axis=2)
-    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+    dist_sq = _squared_color_distance(image_bgr, mean)
+    if hsv is None:
+        hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
     _, sat, val = cv2.split(hsv)
 
     # Passport shadows on a white/off-white wall are usually darker but still
     # low-saturation. Use border connectivity so only wall regions are removed.
-    close_to_wall = diff < (max(18.0, bg_tolerance * 1.25) + 1.5 * mean_std)
+    close_to_wall = dist_sq < (max(18.0, bg_tolerance * 1.25) + 1.5 * mean_std) ** 2
     light_shadow = (sat < min(90, max(45, bg_tolerance * 2.2))) & (
         val > max(90, border_brightness - (70 + bg_tolerance))
     )
@@ -449,31 +632,24 @@ def _border_connected_light_background_mask(image_bgr: np.ndarray, bg_tolerance:
     kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
     bg_candidate = cv2.morphologyEx(bg_candidate, cv2.MORPH_CLOSE, kernel, iterations=2)
 
-    num_labels, labels = cv2.connectedComponents(bg_candidate)
-    if num_labels <= 1:
-        return None
-
-    border_labels = set()
-    h, w = labels.shape
-    border_labels.update(np.unique(labels[0, :]).tolist())
-    border_labels.update(np.unique(labels[h - 1, :]).tolist())
-    border_labels.update(np.unique(labels[:, 0]).tolist())
-    border_labels.update(np.unique(labels[:, w - 1]).tolist())
-    border_labels.discard(0)
-    if not border_labels:
+    bg_mask = _border_connected_region(bg_candidate)
+    if bg_mask is None:
         return None
 
-    bg_mask = np.isin(labels, list(border_labels)).astype(np.uint8) * 255
     bg_mask = cv2.dilate(bg_mask, kernel, iterations=1)
     return cv2.medianBlur(bg_mask, 5)
 
 
 def _get_selfie_segmenter():
     global _selfie_segmenter
-    if _selfie_segmenter is None and mp is not None:
-        if not hasattr(mp, "solutions"):
+    if _selfie_segmenter is None:
+        mp = _import_mediapipe()
+        if mp is None or not hasattr(mp, "solutions"):
             return None
-        _selfie_segmenter = mp.solutions.selfie_segmentation.SelfieSegmentation(model_selection=1)
+        with _selfie_segmenter_lock:
+            if _selfie_segmenter is None:
+                _selfie_segmenter = mp.solutions.selfie_segmentation.SelfieSegmentation(model_selection=1)
+                atexit.register(_selfie_segmenter.close)
     return _selfie_segmenter
 
 
@@ -481,7 +657,8 @@ def _mask_is_usable(
     mask: np.ndarray,
     face_bbox: Optional[Tuple[int, int, int, int]] = None,
 ) -> bool:
-    fg_ratio = float(np.mean(mask > 0))
+    # cv2.countNonZero is a single SIMD pass with no HxW bool temporary.
+    fg_ratio = cv2.countNonZero(mask) / mask.size
     if not 0.02 < fg_ratio < 0.98:
         return False
 
@@ -493,7 +670,7 @@ def _mask_is_usable(
         cx1 = min(w_img, x + int(w * 0.8))
         cy1 = min(h_img, y + int(h * 0.8))
         face_region = mask[cy0:cy1, cx0:cx1]
-        if face_region.size > 0 and float(np.mean(face_region > 0)) < 0.7:
+        if face_region.size > 0 and cv2.countNonZero(face_region) / face_region.size < 0.7:
             return False
 
     return True
@@ -505,19 +682,21 @@ def _selfie_segmentation_mask(
     face_bbox: Optional[Tuple[int, int, int, int]],
     bg_tolerance: float,
     face_protect: float,
+    hsv: Optional[np.ndarray] = None,
 ) -> Optional[np.ndarray]:
     segmenter = _get_selfie_segmenter()
     if segmenter is None:
         return None
 
     image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-    result = segmenter.process(image_rgb)
-    if result.segmentation_mask is None:
+    with _selfie_segmenter_lock:
+        mask = segmenter.process(image_rgb).segmentation_mask
+    if mask is None:
         return None
 
-    mask = result.segmentation_mask
     mask = cv2.GaussianBlur(mask, (7, 7), 0)
-    mask = (mask > threshold).astype(np.uint8) * 255
+    # Quantize the float32 probabilities straight to a 0/255 uint8 mask in one pass.
+    mask = cv2.compare(mask, float(threshold), cv2.CMP_GT)
     mask = cv2.morphologyEx(
         mask,
         cv2.MORPH_CLOSE,
@@ -526,7 +705,7 @@ def _selfie_segmentation_mask(
     )
     mask = cv2.medianBlur(mask, 5)
 
-    shadow_bg = _border_connected_light_background_mask(image_bgr, bg_tolerance=bg_tolerance)
+    shadow_bg = _border_connected_light_background_mask(image_bgr, bg_tolerance=bg_tolerance, hsv=hsv)
     if shadow_bg is not None:
         mask = cv2.bitwise_and(mask, cv2.bitwise_not(shadow_bg))
         if face_bbox is not None:
@@ -552,13 +731,21 @@ def get_foreground_mask(
     prefer_white_key: bool = False,
     bg_tolerance: float = 25.0,
     face_protect: float = 0.4,
+    hsv: Optional[np.ndarray] = None,
 ) -> np.ndarray:
-    """Return a foreground mask (uint8 0/255) using the most reliable method available."""
-    selfie_mask = _selfie_segmentation_mask(image_bgr, threshold, face_bbox, bg_tolerance, face_protect)
+    """Return a foreground mask (uint8 0/255) using the most reliable method available.
+
+    ``hsv`` may carry a precomputed ``BGR2HSV`` conversion of ``image_bgr`` so the
+    HSV-based strategies below share one color-space pass.
+    """
+    if hsv is None:
+        hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+
+    selfie_mask = _selfie_segmentation_mask(image_bgr, threshold, face_bbox, bg_tolerance, face_protect, hsv=hsv)
     if selfie_mask is not None:
         return selfie_mask
 
-    border_key = _border_color_key_mask(image_bgr, bg_tolerance=bg_tolerance)
+    border_key = _border_color_key_mask(image_bgr, bg_tolerance=bg_tolerance, hsv=hsv)
     if border_key is not None:
         return border_key
 
@@ -566,7 +753,7 @@ def get_foreground_mask(
     if white_key is not None:
         return white_key
     if prefer_white_key:
-        return _white_bg_heuristic(image_bgr, bg_tolerance=bg_tolerance)
+        return _white_bg_heuristic(image_bgr, bg_tolerance=bg_tolerance, hsv=hsv)
 
     if face_bbox is not None:
         try:
@@ -580,25 +767,40 @@ def get_foreground_mask(
             x1 = min(w_img - 1, x + w + pad_x)
             y1 = min(h_img - 1, y + h + pad_y)
 
-            mask = np.full(image_bgr.shape[:2], cv2.GC_BGD, dtype=np.uint8)
-            mask[y0:y1, x0:x1] = cv2.GC_PR_FGD
             # Mark central face as sure foreground
             cx0 = max(0, x + int(w * 0.2))
             cy0 = max(0, y + int(h * 0.2))
             cx1 = min(w_img - 1, x + int(w * 0.8))
             cy1 = min(h_img - 1, y + int(h * 0.8))
-            mask[cy0:cy1, cx0:cx1] = cv2.GC_FGD
+
+            # GrabCut cost grows with pixel count; segment a copy capped at
+            # _GRABCUT_MAX_SIDE and upsample the resulting mask.
+            scale = min(1.0, _GRABCUT_MAX_SIDE / max(h_img, w_img))
+            if scale < 1.0:
+                small_bgr = cv2.resize(image_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            else:
+                small_bgr = image_bgr
+
+            def _s(v: int) -> int:
+                return int(round(v * scale))
+
+            mask = np.full(small_bgr.shape[:2], cv2.GC_BGD, dtype=np.uint8)
+            mask[_s(y0) : _s(y1), _s(x0) : _s(x1)] = cv2.GC_PR_FGD
+            mask[_s(cy0) : _s(cy1), _s(cx0) : _s(cx1)] = cv2.GC_FGD
 
             bgd_model = np.zeros((1, 65), np.float64)
             fgd_model = np.zeros((1, 65), np.float64)
-            cv2.grabCut(image_bgr, mask, None, bgd_model, fgd_model, 5, cv2.GC_INIT_WITH_MASK)
+            cv2.grabCut(small_bgr, mask, None, bgd_model, fgd_model, 5, cv2.GC_INIT_WITH_MASK)
 
-            fg_mask = np.where((mask == cv2.GC_FGD) | (mask == cv2.GC_PR_FGD), 255, 0).astype(np.uint8)
+            fg_mask = cv2.LUT(mask, _GRABCUT_FG_LUT)
+            if scale < 1.0:
+                fg_mask = cv2.resize(fg_mask, (w_img, h_img), interpolation=cv2.INTER_LINEAR)
+                _, fg_mask = cv2.threshold(fg_mask, 127, 255, cv2.THRESH_BINARY)
             fg_mask = cv2.medianBlur(fg_mask, 5)
 
             # If the face region isn't mostly foreground, the mask likely inverted.
             face_region = fg_mask[cy0:cy1, cx0:cx1]
-            if face_region.size > 0 and (np.mean(face_region) < 128):
+            if face_region.size > 0 and cv2.mean(face_region)[0] < 128:
                 fg_mask = cv2.bitwise_not(fg_mask)
 
             # Force face + nearby area to foreground to avoid "cutting into" subject.
@@ -621,7 +823,7 @@ def get_foreground_mask(
         fg_mask[y0:y1, x0:x1] = 255
         return fg_mask
 
-    return _foreground_mask_hsv(image_bgr)
+    return _foreground_mask_hsv(image_bgr, hsv=hsv)
 
 
 def get_foreground_alpha(
@@ -655,6 +857,38 @@ def get_foreground_alpha(
     )
 
 
+def _alpha_composite(image_bgr: np.ndarray, background_rgb: Tuple[int, int, int], alpha: np.ndarray) -> np.ndarray:
+    """Blend ``image_bgr`` over a solid ``background_rgb`` with a uint8 (0-255) alpha mask.
+
+    Works in uint16 fixed point, which is exact for 8-bit inputs and avoids the
+    float32 temporaries of the equivalent ``image * a + background * (1 - a)``.
+    Masks here are mostly 0/255 with a feathered rim, so opaque pixels are copied
+    with ``cv2.copyTo`` over a background fill and only the rim is blended.
+    """
+    # One shape-(3,) vector broadcasts over every fill and blend below.
+    background_bgr = np.array(background_rgb[::-1], dtype=np.uint16)
+    edge = cv2.inRange(alpha, 1, 254)
+    if cv2.countNonZero(edge) > alpha.size // 4:
+        # Mostly soft matte: a dense blend beats gathering the pixels.
+        alpha16 = alpha[:, :, None].astype(np.uint16)
+        composite = image_bgr.astype(np.uint16) * alpha16
+        composite += background_bgr * (255 - alpha16)
+        composite //= 255
+        return composite.astype(np.uint8)
+
+    composite = np.empty_like(image_bgr)
+    composite[:] = background_bgr
+    cv2.copyTo(image_bgr, cv2.compare(alpha, 255, cv2.CMP_EQ), composite)
+    ys, xs = np.nonzero(edge)
+    if ys.size:
+        a = alpha[ys, xs][:, None].astype(np.uint16)
+        rim = image_bgr[ys, xs].astype(np.uint16) * a
+        rim += background_bgr * (255 - a)
+        rim //= 255
+        composite[ys, xs] = rim.astype(np.uint8)
+    return composite
+
+
 def replace_background(
     image_bgr: np.ndarray,
     background_rgb: Tuple[int, int, int],
@@ -668,20 +902,13 @@ def replace_background(
     """Replace background using the best available foreground mask."""
     birefnet_alpha = _birefnet_alpha_mask(image_bgr, face_bbox=face_bbox)
     if birefnet_alpha is not None:
-        background = np.full_like(image_bgr, background_rgb[::-1])
-        alpha = birefnet_alpha.astype(np.float32) / 255.0
-        alpha = alpha[:, :, None]
-        composite = image_bgr.astype(np.float32) * alpha + background.astype(np.float32) * (1.0 - alpha)
-        return composite.astype(np.uint8)
+        return _alpha_composite(image_bgr, background_rgb, birefnet_alpha)
 
     rembg_alpha = _rembg_alpha_mask(image_bgr, face_bbox=face_bbox)
     if rembg_alpha is not None:
-        background = np.full_like(image_bgr, background_rgb[::-1])
-        alpha = rembg_alpha.astype(np.float32) / 255.0
-        alpha = alpha[:, :, None]
-        composite = image_bgr.astype(np.float32) * alpha + background.astype(np.float32) * (1.0 - alpha)
-        return composite.astype(np.uint8)
+        return _alpha_composite(image_bgr, background_rgb, rembg_alpha)
 
+    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
     fg_mask = get_foreground_mask(
         image_bgr,
         threshold=threshold,
@@ -691,14 +918,15 @@ def replace_background(
         prefer_white_key=True,
         bg_tolerance=bg_tolerance,
         face_protect=face_protect,
+        hsv=hsv,
     )
     # If the mask is almost all-foreground, fall back to white-key.
-    if float(np.mean(fg_mask > 0)) > 0.98:
+    if cv2.countNonZero(fg_mask) / fg_mask.size > 0.98:
         white_key = _white_key_mask(image_bgr, bg_tolerance=bg_tolerance)
         if white_key is not None:
             fg_mask = white_key
 
-    shadow_bg = _border_connected_light_background_mask(image_bgr, bg_tolerance=bg_tolerance)
+    shadow_bg = _border_connected_light_background_mask(image_bgr, bg_tolerance=bg_tolerance, hsv=hsv)
     if shadow_bg is not None:
         fg_mask = cv2.bitwise_and(fg_mask, cv2.bitwise_not(shadow_bg))
 
@@ -711,19 +939,48 @@ def replace_background(
         face_core = np.zeros_like(fg_mask)
         cv2.ellipse(face_core, (cx, cy), axes, 0, 0, 360, 255, -1)
         fg_mask = cv2.bitwise_or(fg_mask, face_core)
-    background = np.full_like(image_bgr, background_rgb[::-1])  # RGB to BGR
 
     # Feather edges for a more natural composite.
     kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
     fg_mask = cv2.erode(fg_mask, kernel, iterations=1)
-    alpha = cv2.GaussianBlur(fg_mask, (11, 11), 0).astype(np.float32) / 255.0
-    alpha = alpha[:, :, None]
-    composite = image_bgr.astype(np.float32) * alpha + background.astype(np.float32) * (1.0 - alpha)
-    return composite.astype(np.uint8)
+    # Blur at half resolution (sigma 1 there ~ the former 11x11 kernel's sigma 2
+    # at full size) and upsample; the feathered edge is visually unchanged.
+    mask_h, mask_w = fg_mask.shape[:2]
+    small = cv2.resize(fg_mask, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    small = cv2.GaussianBlur(small, (7, 7), 1.0)
+    alpha = cv2.resize(small, (mask_w, mask_h), interpolation=cv2.INTER_LINEAR)
+    return _alpha_composite(image_bgr, background_rgb, alpha)
+
+
+@dataclass(frozen=True, slots=True)
+class _SpecTargets:
+    """Pixel targets derived from a PhotoSpec at a given DPI."""
+
+    out_w: int
+    out_h: int
+    target_head_height: float
+    target_eye_y: int
+    min_top_margin: int
+    extra_headroom: int
+
+
+@functools.lru_cache(maxsize=None)
+def _spec_targets(spec: PhotoSpec, dpi: int) -> _SpecTargets:
+    # Specs are frozen (hashable), so batches against one spec/DPI compute this once.
+    out_w, out_h = int(round(spec.width_in * dpi)), int(round(spec.height_in * dpi))
+    return _SpecTargets(
+        out_w=out_w,
+        out_h=out_h,
+        target_head_height=spec.head_height_ratio * out_h,
+        target_eye_y=int(round(out_h * (1 - spec.eye_line_from_bottom_ratio))),
+        min_top_margin=int(round(out_h * spec.top_margin_ratio)),
+        extra_headroom=int(round(out_h * 0.02)),
+    )
 
 
 def compute_output_size_px(spec: PhotoSpec, dpi: int) -> Tuple[int, int]:
-    return int(round(spec.width_in * dpi)), int(round(spec.height_in * dpi))
+    targets = _spec_targets(spec, dpi)
+    return targets.out_w, targets.out_h
 
 
 def _unsharp_mask(image_bgr: np.ndarray, amount: float = 0.8, radius: float = 1.5, threshold: int = 2) -> np.ndarray:
@@ -753,11 +1010,7 @@ def clean_card_photo(
     """
     alpha = get_foreground_alpha(image_bgr, face_bbox=None, prefer_white_key=True, bg_tolerance=bg_tolerance)
 
-    background = np.full_like(image_bgr, background_rgb[::-1])  # RGB to BGR
-    alpha_f = (alpha.astype(np.float32) / 255.0)[:, :, None]
-    composite = (image_bgr.astype(np.float32) * alpha_f + background.astype(np.float32) * (1.0 - alpha_f)).astype(
-        np.uint8
-    )
+    composite = _alpha_composite(image_bgr, background_rgb, alpha)
 
     ys, xs = np.where(alpha > 40)
     if ys.size == 0 or xs.size == 0:
@@ -965,10 +1218,11 @@ def crop_to_spec(
     enforce_target: bool = True,
 ) -> np.ndarray:
     """Crop and resize to spec while maintaining aspect ratio (no face distortion)."""
-    out_w, out_h = compute_output_size_px(spec, dpi)
+    targets = _spec_targets(spec, dpi)
+    out_w, out_h = targets.out_w, targets.out_h
     x_min, y_min, box_w, box_h = bbox
 
-    target_head_height = spec.head_height_ratio * out_h
+    target_head_height = targets.target_head_height
     # Compute scale according to chosen fit mode.
     if fit_mode == "actual":
         # Try to measure actual head top/chin from segmentation; fall back to face bbox estimate
@@ -994,14 +1248,16 @@ def crop_to_spec(
         # Default/spec-driven behavior: scale so head occupies spec.head_height_ratio of output
         scale = target_head_height / max(box_h * inflate, 1)
 
-    # Scale uniformly to preserve aspect ratio
-    resized = cv2.resize(image_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    # Scale uniformly to preserve aspect ratio. Within 2% of 1.0 the head-size
+    # difference is well inside spec tolerance, so skip the resample.
+    if abs(scale - 1.0) < 0.02:
+        scale = 1.0
 
     eye_x, eye_y = eye_point
     eye_x = int(round(eye_x * scale))
     eye_y = int(round(eye_y * scale))
 
-    target_eye_y = int(round(out_h * (1 - spec.eye_line_from_bottom_ratio)))
+    target_eye_y = targets.target_eye_y
 
     left = int(round(eye_x - out_w / 2))
     top = int(round(eye_y - target_eye_y))
@@ -1010,8 +1266,8 @@ def crop_to_spec(
     # Estimate head top slightly above detected box to account for hairline.
     head_top = int(round((y_min - box_h * 0.15) * scale))
     # Provide more headroom (common ID specs expect visible margin above head).
-    min_top_margin = int(round(out_h * spec.top_margin_ratio))
-    extra_headroom = int(round(out_h * 0.02))
+    min_top_margin = targets.min_top_margin
+    extra_headroom = targets.extra_headroom
     desired_top = head_top - min_top_margin - extra_headroom
     # When enforcing the target head size, avoid moving the crop top in a way
     # that would change the final scaling/positioning; only adjust when not enforced.
@@ -1020,7 +1276,14 @@ def crop_to_spec(
 
     # Crop with padding - maintains aspect ratio
     pad_rgb = background_rgb if background_rgb is not None else spec.background_rgb
-    cropped = crop_with_padding(resized, left, top, out_w, out_h, pad_rgb)
+    if scale == 1.0:
+        # crop_with_padding returns a bare slice when no padding is needed; copy it so
+        # callers always get fresh memory, as they do from the resampling path.
+        cropped = crop_with_padding(image_bgr, left, top, out_w, out_h, pad_rgb)
+        if np.may_share_memory(cropped, image_bgr):
+            cropped = cropped.copy()
+    else:
+        cropped = _scaled_crop(image_bgr, scale, left, top, out_w, out_h, pad_rgb)
     
     # Final resize to exact dimensions if needed (minimal distortion since we've already positioned correctly)
     # Only resize if aspect ratio is significantly different
@@ -1033,6 +1296,38 @@ def crop_to_spec(
     return cropped
 
 
+def _scaled_crop(
+    image_bgr: np.ndarray,
+    scale: float,
+    left: int,
+    top: int,
+    width: int,
+    height: int,
+    background_rgb: Tuple[int, int, int],
+) -> np.ndarray:
+    """Crop ``(left, top, width, height)`` from ``image_bgr`` scaled by ``scale``.
+
+    Only the source region under the crop window (plus a few pixels of filter
+    context) is resampled, rather than scaling the whole frame and discarding
+    most of it. The window lands within half an output pixel of where a
+    full-frame resize would put it.
+    """
+    img_h, img_w = image_bgr.shape[:2]
+    margin = 3  # source pixels of context for the cubic / area kernels
+    x0 = max(0, int(math.floor(left / scale)) - margin)
+    y0 = max(0, int(math.floor(top / scale)) - margin)
+    x1 = min(img_w, int(math.ceil((left + width) / scale)) + margin)
+    y1 = min(img_h, int(math.ceil((top + height) / scale)) + margin)
+    if x1 <= x0 or y1 <= y0:
+        # Window lies entirely outside the image: all padding.
+        return crop_with_padding(image_bgr[:0, :0], left, top, width, height, background_rgb)
+
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    roi = cv2.resize(image_bgr[y0:y1, x0:x1], None, fx=scale, fy=scale, interpolation=interpolation)
+    roi_x, roi_y = int(round(x0 * scale)), int(round(y0 * scale))
+    return crop_with_padding(roi, left - roi_x, top - roi_y, width, height, background_rgb)
+
+
 def crop_with_padding(
     image_bgr: np.ndarray,
     left: int,
@@ -1051,20 +1346,18 @@ def crop_with_padding(
     pad_right = max(0, right - img_w)
     pad_bottom = max(0, bottom - img_h)
 
-    if any((pad_left, pad_top, pad_right, pad_bottom)):
-        image_bgr = cv2.copyMakeBorder(
-            image_bgr,
-            pad_top,
-            pad_bottom,
-            pad_left,
-            pad_right,
-            borderType=cv2.BORDER_CONSTANT,
-            value=background_rgb,
-        )
-        left += pad_left
-        top += pad_top
+    if not any((pad_left, pad_top, pad_right, pad_bottom)):
+        # Fully inside the source: a plain slice, no copy.
+        return image_bgr[top:bottom, left:right]
 
-    return image_bgr[top : top + height, left : left + width]
+    # Build the output at its final size and copy only the overlapping region,
+    # instead of padding (and so copying) the whole source with copyMakeBorder.
+    out = np.full((height, width, image_bgr.shape[2]), background_rgb, dtype=image_bgr.dtype)
+    src_x0, src_y0 = max(left, 0), max(top, 0)
+    src_x1, src_y1 = min(right, img_w), min(bottom, img_h)
+    if src_x1 > src_x0 and src_y1 > src_y0:
+        out[src_y0 - top : src_y1 - top, src_x0 - left : src_x1 - left] = image_bgr[src_y0:src_y1, src_x0:src_x1]
+    return out
 
 
 def build_print_sheet(
@@ -1089,6 +1382,32 @@ def build_print_sheet(
     Returns:
         PIL Image with tiled photos
     """
+    sheet_arr = build_print_sheet_array(
+        np.asarray(photo.convert("RGB")),
+        layout,
+        dpi,
+        margin_in=margin_in,
+        spacing_in=spacing_in,
+        copies=copies,
+        draw_guides=draw_guides,
+    )
+    return Image.fromarray(sheet_arr)
+
+
+def build_print_sheet_array(
+    photo_rgb: np.ndarray,
+    layout: LayoutSpec,
+    dpi: int,
+    margin_in: float = 0.25,
+    spacing_in: float = 0.05,
+    copies: int = 6,
+    draw_guides: bool = True,
+) -> np.ndarray:
+    """Array form of build_print_sheet: tile an RGB uint8 photo onto an RGB sheet array.
+
+    Callers that already hold an ndarray (and encode with OpenCV) should use this
+    directly; wrapping the result as a PIL Image costs a full copy of the sheet.
+    """
     sheet_w = int(round(layout.width_in * dpi))
     sheet_h = int(round(layout.height_in * dpi))
 
@@ -1096,8 +1415,9 @@ def build_print_sheet(
     margin = int(round(margin_in * dpi))
     spacing = int(round(spacing_in * dpi))
 
-    sheet = Image.new("RGB", (sheet_w, sheet_h), (255, 255, 255))
-    photo_w, photo_h = photo.size
+    photo_h, photo_w = photo_rgb.shape[:2]
+    if spacing <= -min(photo_w, photo_h):
+        raise ValueError("spacing_in must be larger than minus the photo size")
 
     # Calculate how many photos fit per row and column
     available_width = sheet_w - 2 * margin
@@ -1116,7 +1436,7 @@ def build_print_sheet(
 
     # Choose orientation that fits more photos
     if total_photos_rot > total_photos_orig:
-        photo = photo.rotate(90, expand=True)
+        photo_rgb = np.rot90(photo_rgb)  # counter-clockwise, like PIL's rotate(90)
         photo_w, photo_h = photo_w_rot, photo_h_rot
         max_cols = max_cols_rot
         max_rows = max_rows_rot
@@ -1132,80 +1452,150 @@ def build_print_sheet(
     left_margin = margin + (available_width - total_photos_width) // 2
     top_margin = margin + (available_height - total_photos_height) // 2
 
-    if draw_guides:
-        # Create drawing context for guide lines
-        from PIL import ImageDraw
-        draw = ImageDraw.Draw(sheet)
-        guide_color = (238, 238, 238)  # Nearly invisible cutting guide lines
-        guide_width = 1
-        outline_color = (242, 242, 242)  # Very light photo outline for cutting edges
-        outline_width = 1
-
-    placed = 0
-    for row in range(max_rows):
-        for col in range(max_cols):
-            if placed >= copies:
-                break
-            x = left_margin + col * (photo_w + spacing)
-            y = top_margin + row * (photo_h + spacing)
-            sheet.paste(photo, (x, y))
-
+    # Tile into one contiguous buffer rather than a PIL paste per copy.
+    photo_arr = photo_rgb
+    sheet_arr = np.full((sheet_h, sheet_w, 3), 255, dtype=np.uint8)
+    placed = max(0, min(copies, max_cols * max_rows))
+    step_x, step_y = photo_w + spacing, photo_h + spacing
+    grid_right = left_margin + total_photos_width
+    grid_bottom = top_margin + total_photos_height
+
+    guide_color = (238, 238, 238)  # Nearly invisible cutting guide lines
+    outline_color = (242, 242, 242)  # Very light photo outline for cutting edges
+    corner_marker_color = (232, 232, 232)
+    corner_size = 4
+
+    # Fast path: the grid sits inside the sheet, so every placed photo is a cell
+    # of one or two strided (rows, cols, h, w, 3) views and photos, outlines and
+    # corner marks are each a handful of slice writes for all copies at once.
+    fast_path = (
+        spacing >= 0
+        and left_margin >= 0
+        and top_margin >= 0
+        and grid_right <= sheet_w
+        and grid_bottom <= sheet_h
+        and min(photo_w, photo_h) > corner_size
+    )
+    if fast_path:
+        full_rows, last_cols = divmod(placed, max_cols)
+        blocks = []
+        if full_rows:
+            blocks.append(_tile_view(sheet_arr, left_margin, top_margin, full_rows, max_cols, step_x, step_y, photo_w, photo_h))
+        if last_cols:
+            blocks.append(
+                _tile_view(sheet_arr, left_margin, top_margin + full_rows * step_y, 1, last_cols, step_x, step_y, photo_w, photo_h)
+            )
+        for block in blocks:
+            block[...] = photo_arr
+    else:
+        # Grid origins for every placed copy, shared with the guide painting below.
+        idx = np.arange(placed)
+        xs = left_margin + (idx % max_cols) * step_x
+        ys = top_margin + (idx // max_cols) * step_y
+        along_w, along_h = np.arange(photo_w), np.arange(photo_h)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            # Clip like PIL's paste does when the photo overhangs the sheet.
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + photo_w, sheet_w), min(y + photo_h, sheet_h)
+            if x1 > x0 and y1 > y0:
+                sheet_arr[y0:y1, x0:x1] = photo_arr[y0 - y : y1 - y, x0 - x : x1 - x]
             if draw_guides:
-                # Draw subtle outline around each photo for clear cutting edges
-                draw.rectangle(
-                    [(x, y), (x + photo_w - 1, y + photo_h - 1)],
-                    outline=outline_color,
-                    width=outline_width
+                # Outline each copy as soon as it is pasted: with negative spacing
+                # the next copy overlaps and must cover part of this outline.
+                right, bottom = x + photo_w - 1, y + photo_h - 1
+                _paint_pixels(
+                    sheet_arr,
+                    [y + 0 * along_w, bottom + 0 * along_w, y + along_h, y + along_h],
+                    [x + along_w, x + along_w, x + 0 * along_h, right + 0 * along_h],
+                    outline_color,
                 )
 
-            placed += 1
-        if placed >= copies:
-            break
+    if not draw_guides:
+        return sheet_arr
+
+    line_xs = left_margin + np.arange(1, max_cols) * step_x - spacing // 2
+    line_ys = top_margin + np.arange(1, max_rows) * step_y - spacing // 2
+    arm = corner_size + 1
+    if fast_path:
+        # Subtle 1 px outline around each photo for clear cutting edges.
+        for block in blocks:
+            block[:, :, 0] = block[:, :, -1] = outline_color
+            block[:, :, :, 0] = block[:, :, :, -1] = outline_color
+        # Guide lines between photos span the full grid (for cutting guidance).
+        sheet_arr[top_margin : grid_bottom + 1, line_xs] = guide_color
+        sheet_arr[line_ys, left_margin : grid_right + 1] = guide_color
+        # Tiny L-shaped marks at the four corners of each photo for precise cutting.
+        for block in blocks:
+            for edge_row, edge_col in ((0, 0), (0, -1), (-1, 0), (-1, -1)):
+                arm_cols = slice(0, arm) if edge_col == 0 else slice(-arm, None)
+                arm_rows = slice(0, arm) if edge_row == 0 else slice(-arm, None)
+                block[:, :, edge_row, arm_cols] = corner_marker_color
+                block[:, :, arm_rows, edge_col] = corner_marker_color
+        return sheet_arr
+
+    # General path (overhanging grid or tiny photos): paint explicit pixel
+    # coordinates, clipped to the sheet the way PIL's drawing clips.
+    right, bottom = xs + photo_w - 1, ys + photo_h - 1
+    span_y = np.arange(top_margin, grid_bottom + 1)
+    span_x = np.arange(left_margin, grid_right + 1)
+    _paint_pixels(sheet_arr, [span_y[None, :] + 0 * line_xs[:, None]], [line_xs[:, None] + 0 * span_y], guide_color)
+    _paint_pixels(sheet_arr, [line_ys[:, None] + 0 * span_x], [span_x[None, :] + 0 * line_ys[:, None]], guide_color)
+    offsets = np.arange(arm)
+    fixed = 0 * offsets
+    _paint_pixels(
+        sheet_arr,
+        [
+            ys[:, None] + fixed, ys[:, None] + offsets,  # top-left
+            ys[:, None] + fixed, ys[:, None] + offsets,  # top-right
+            bottom[:, None] + fixed, bottom[:, None] - offsets,  # bottom-left
+            bottom[:, None] + fixed, bottom[:, None] - offsets,  # bottom-right
+        ],
+        [
+            xs[:, None] + offsets, xs[:, None] + fixed,
+            right[:, None] - offsets, right[:, None] + fixed,
+            xs[:, None] + offsets, xs[:, None] + fixed,
+            right[:, None] - offsets, right[:, None] + fixed,
+        ],
+        corner_marker_color,
+    )
+    return sheet_arr
+
+
+def _tile_view(
+    sheet_arr: np.ndarray,
+    x: int,
+    y: int,
+    rows: int,
+    cols: int,
+    step_x: int,
+    step_y: int,
+    tile_w: int,
+    tile_h: int,
+) -> np.ndarray:
+    """Writable (rows, cols, tile_h, tile_w, 3) view of a grid of tiles inside ``sheet_arr``.
+
+    Assigning a photo to the view broadcasts it into every cell at once. Callers
+    must ensure the grid lies inside the sheet and that tiles do not overlap.
+    """
+    row_stride, col_stride, chan_stride = sheet_arr.strides
+    return np.lib.stride_tricks.as_strided(
+        sheet_arr[y:, x:],
+        shape=(rows, cols, tile_h, tile_w, sheet_arr.shape[2]),
+        strides=(row_stride * step_y, col_stride * step_x, row_stride, col_stride, chan_stride),
+        writeable=True,
+    )
 
-    if draw_guides:
-        # Draw vertical guide lines between photos (for cutting guidance)
-        for col in range(1, max_cols):
-            x = left_margin + col * (photo_w + spacing) - spacing // 2
-            draw.line([(x, top_margin), (x, top_margin + max_rows * photo_h + (max_rows - 1) * spacing)],
-                      fill=guide_color, width=guide_width)
-
-        # Draw horizontal guide lines between photos (for cutting guidance)
-        for row in range(1, max_rows):
-            y = top_margin + row * (photo_h + spacing) - spacing // 2
-            draw.line([(left_margin, y), (left_margin + max_cols * photo_w + (max_cols - 1) * spacing, y)],
-                      fill=guide_color, width=guide_width)
-        
-        # Draw corner markers at photo edges for precise cutting (tiny L-shaped corners at each photo's edges)
-        corner_marker_color = (232, 232, 232)
-        corner_size = 4
-        
-        for row in range(max_rows):
-            for col in range(max_cols):
-                if row * max_cols + col >= copies:
-                    break
-                x = left_margin + col * (photo_w + spacing)
-                y = top_margin + row * (photo_h + spacing)
-                
-                # Draw small corner marks at the 4 corners of each photo
-                # Top-left corner
-                draw.line([(x, y), (x + corner_size, y)], fill=corner_marker_color, width=1)
-                draw.line([(x, y), (x, y + corner_size)], fill=corner_marker_color, width=1)
-                
-                # Top-right corner
-                draw.line([(x + photo_w - 1, y), (x + photo_w - 1 - corner_size, y)], fill=corner_marker_color, width=1)
-                draw.line([(x + photo_w - 1, y), (x + photo_w - 1, y + corner_size)], fill=corner_marker_color, width=1)
-                
-                # Bottom-left corner
-                draw.line([(x, y + photo_h - 1), (x + corner_size, y + photo_h - 1)], fill=corner_marker_color, width=1)
-                draw.line([(x, y + photo_h - 1), (x, y + photo_h - 1 - corner_size)], fill=corner_marker_color, width=1)
-                
-                # Bottom-right corner
-                draw.line([(x + photo_w - 1, y + photo_h - 1), (x + photo_w - 1 - corner_size, y + photo_h - 1)], fill=corner_marker_color, width=1)
-                draw.line([(x + photo_w - 1, y + photo_h - 1), (x + photo_w - 1, y + photo_h - 1 - corner_size)], fill=corner_marker_color, width=1)
 
-    return sheet
+def _paint_pixels(sheet_arr: np.ndarray, ys: list, xs: list, color: Tuple[int, int, int]) -> None:
+    """Set every (y, x) pixel listed in the paired coordinate arrays, clipped to the sheet."""
+    ys = np.concatenate([np.ravel(v) for v in ys])
+    xs = np.concatenate([np.ravel(v) for v in xs])
+    h, w = sheet_arr.shape[:2]
+    keep = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+    sheet_arr[ys[keep], xs[keep]] = color
 
 
+@functools.lru_cache(maxsize=32)
 def parse_layout(value: str) -> LayoutSpec:
     try:
         width_str, height_str = value.lower().split("x")
@@ -1214,36 +1604,98 @@ def parse_layout(value: str) -> LayoutSpec:
         raise argparse.ArgumentTypeError("layout must be like 4x6 or 6x6") from exc
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Process ID photos for passport specs.")
-    parser.add_argument("input", type=Path, help="Input photo path")
-    parser.add_argument("--specs", type=Path, default=Path("specs.json"))
-    parser.add_argument("--country", required=True, help="Country code from specs.json")
-    parser.add_argument("--dpi", type=int, default=300)
-    parser.add_argument("--replace-bg", action="store_true")
-    parser.add_argument("--inflate", type=float, default=1.15, help="Inflation factor applied to detected face box when scaling (default: 1.15)")
-    parser.add_argument("--bbox-expand-x", type=float, default=0.4, help="Horizontal bbox expansion fraction for background/foreground mask (default: 0.4)")
-    parser.add_argument("--bbox-expand-y", type=float, default=0.6, help="Vertical bbox expansion fraction for background/foreground mask (default: 0.6)")
-    parser.add_argument("--fit-mode", choices=("spec","actual"), default="spec", help="Crop sizing mode: 'spec' enforces spec head size, 'actual' fits crop using measured head top/chin from the photo")
-    parser.add_argument("--body-factor", type=float, default=2.0, help="When --fit-mode=actual, include this multiple of head height for crop height (default 2.0)")
-    # Enforce the spec target head size by default; provide an opt-out flag.
-    parser.add_argument("--no-enforce-target", dest="enforce_target", action="store_false", help="Do not force final head size to match spec (allow looser framing)")
-    parser.set_defaults(enforce_target=True)
-    parser.add_argument("--layout", type=parse_layout, default=parse_layout("4x6"))
-    parser.add_argument("--copies", type=int, default=6)
-    parser.add_argument("--margin", type=float, default=0.1, help="Margin in inches")
-    parser.add_argument("--spacing", type=float, default=0.1, help="Spacing in inches")
-    parser.add_argument("--output-dir", type=Path, default=Path("output"))
-    args = parser.parse_args()
+_IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
 
-    specs = load_specs(args.specs)
-    if args.country not in specs:
-        raise SystemExit(f"Unknown country '{args.country}'. Available: {', '.join(specs)}")
-    spec = specs[args.country]
 
-    image_bgr = cv2.imread(str(args.input))
+def _expand_inputs(paths: List[Path]) -> List[Path]:
+    """Replace any folder among ``paths`` with the photos directly inside it."""
+    expanded: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            expanded.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in _IMAGE_SUFFIXES))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def _batch_output_prefixes(paths: List[Path], country: str) -> List[str]:
+    """One output prefix per batch input, ``<stem>_<country>``, unique within the batch.
+
+    Inputs sharing a stem (``a.jpg`` + ``a.png``, ``d1/a.jpg d2/a.jpg``, or one file
+    given twice) would otherwise write to the same output files from parallel
+    workers, so later repeats get ``-2``, ``-3``, ... appended to the stem. Stems are
+    compared case-insensitively for case-insensitive filesystems.
+    """
+    used = set()
+    prefixes: List[str] = []
+    for path in paths:
+        stem = candidate = path.stem
+        n = 1
+        while candidate.lower() in used:
+            n += 1
+            candidate = f"{stem}-{n}"
+        used.add(candidate.lower())
+        prefixes.append(f"{candidate}_{country}")
+    return prefixes
+
+
+def _write_jpeg(path: Path, image_bgr: np.ndarray, quality: int = 95) -> None:
+    # OpenCV's bundled libjpeg-turbo encodes noticeably faster than Pillow's.
+    if not cv2.imwrite(str(path), image_bgr, [cv2.IMWRITE_JPEG_QUALITY, quality]):
+        raise RuntimeError(f"Could not write image: {path}")
+
+
+def _get_head_fill_executor() -> ThreadPoolExecutor:
+    """Process-wide helper thread that process_file overlaps head-fill measurement on.
+
+    Long-lived on purpose: the Haar cascade is cached per thread, so a fresh
+    executor per photo would reload the cascade XML on every call.
+    """
+    global _head_fill_executor
+    if _head_fill_executor is None:
+        with _head_fill_executor_lock:
+            if _head_fill_executor is None:
+                _head_fill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idphoto-head-fill")
+    return _head_fill_executor
+
+
+def _measure_head_fill(cropped_bgr: np.ndarray) -> Optional[float]:
+    """Head height over image height for the final crop (face bbox or mask fallback)."""
+    try:
+        cropped_bbox, _ = detect_face(cropped_bgr)
+        bx, by, bw, bh = cropped_bbox
+        est_top = int(round(by - bh * 0.15))
+        est_bottom = int(round(by + bh))
+        head_h = max(1, est_bottom - est_top)
+        final_h = max(1, cropped_bgr.shape[0])
+        return head_h / final_h
+    except Exception:
+        try:
+            alpha = get_foreground_alpha(cropped_bgr, face_bbox=None)
+            ys, xs = np.where(alpha > 40)
+            if ys.size > 0:
+                head_h = max(1, int(ys.max() - ys.min()))
+                final_h = max(1, cropped_bgr.shape[0])
+                return head_h / final_h
+        except Exception:
+            pass
+    return None
+
+
+def process_file(
+    input_path: Path,
+    spec: PhotoSpec,
+    args: argparse.Namespace,
+    output_prefix: str,
+) -> Tuple[Path, Path, Optional[float]]:
+    """Run the full CLI pipeline for one input photo and save its outputs.
+
+    Kept at module level (and fed only picklable arguments) so ``main`` can hand
+    it to a process pool when several inputs are given.
+    """
+    image_bgr = cv2.imread(str(input_path))
     if image_bgr is None:
-        raise SystemExit("Could not read input image.")
+        raise SystemExit(f"Could not read input image: {input_path}")
 
     bbox, eye_point = detect_face(image_bgr)
 
@@ -1274,50 +1726,99 @@ def main() -> None:
     output_dir = args.output_dir
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    cropped_rgb = cv2.cvtColor(cropped_bgr, cv2.COLOR_BGR2RGB)
-    photo = Image.fromarray(cropped_rgb)
-
-    # Compute actual head-fill from the final cropped image (face bbox or mask fallback)
-    actual_fill = None
-    try:
-        cropped_bbox, _ = detect_face(cropped_bgr)
-        bx, by, bw, bh = cropped_bbox
-        est_top = int(round(by - bh * 0.15))
-        est_bottom = int(round(by + bh))
-        head_h = max(1, est_bottom - est_top)
-        final_h = max(1, cropped_bgr.shape[0])
-        actual_fill = head_h / final_h
-    except Exception:
-        try:
-            alpha = get_foreground_alpha(cropped_bgr, face_bbox=None)
-            ys, xs = np.where(alpha > 40)
-            if ys.size > 0:
-                head_h = max(1, int(ys.max() - ys.min()))
-                final_h = max(1, cropped_bgr.shape[0])
-                actual_fill = head_h / final_h
-        except Exception:
-            actual_fill = None
+    # Measuring head fill re-runs face detection on the final crop; it only reads
+    # cropped_bgr, so let it overlap the JPEG encodes (both release the GIL).
+    fill_future = _get_head_fill_executor().submit(_measure_head_fill, cropped_bgr)
 
-    photo_path = output_dir / f"{args.country.lower()}_photo.jpg"
-    photo.save(photo_path, quality=95)
+    photo_path = output_dir / f"{output_prefix}_photo.jpg"
+    _write_jpeg(photo_path, cropped_bgr)
 
-    sheet = build_print_sheet(
-        photo=photo,
+    # Sheet guides are neutral grays, so tiling the BGR crop directly gives the
+    # BGR sheet OpenCV encodes, with no colour conversion or PIL round-trip.
+    sheet_bgr = build_print_sheet_array(
+        cropped_bgr,
         layout=args.layout,
         dpi=args.dpi,
         margin_in=args.margin,
         spacing_in=args.spacing,
         copies=args.copies,
     )
-    sheet_path = output_dir / f"{args.country.lower()}_sheet_{int(args.layout.width_in)}x{int(args.layout.height_in)}.jpg"
-    sheet.save(sheet_path, quality=95)
+    sheet_path = output_dir / f"{output_prefix}_sheet_{int(args.layout.width_in)}x{int(args.layout.height_in)}.jpg"
+    _write_jpeg(sheet_path, sheet_bgr)
+    actual_fill = fill_future.result()
+
+    return photo_path, sheet_path, actual_fill
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process ID photos for passport specs.")
+    parser.add_argument("input", type=Path, nargs="+", help="Input photo path(s) or folder(s) of photos")
+    parser.add_argument("--specs", type=Path, default=Path("specs.json"))
+    parser.add_argument("--country", required=True, help="Country code from specs.json")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--replace-bg", action="store_true")
+    parser.add_argument("--inflate", type=float, default=1.15, help="Inflation factor applied to detected face box when scaling (default: 1.15)")
+    parser.add_argument("--bbox-expand-x", type=float, default=0.4, help="Horizontal bbox expansion fraction for background/foreground mask (default: 0.4)")
+    parser.add_argument("--bbox-expand-y", type=float, default=0.6, help="Vertical bbox expansion fraction for background/foreground mask (default: 0.6)")
+    parser.add_argument("--fit-mode", choices=("spec","actual"), default="spec", help="Crop sizing mode: 'spec' enforces spec head size, 'actual' fits crop using measured head top/chin from the photo")
+    parser.add_argument("--body-factor", type=float, default=2.0, help="When --fit-mode=actual, include this multiple of head height for crop height (default 2.0)")
+    # Enforce the spec target head size by default; provide an opt-out flag.
+    parser.add_argument("--no-enforce-target", dest="enforce_target", action="store_false", help="Do not force final head size to match spec (allow looser framing)")
+    parser.set_defaults(enforce_target=True)
+    parser.add_argument("--layout", type=parse_layout, default=parse_layout("4x6"))
+    parser.add_argument("--copies", type=int, default=6)
+    parser.add_argument("--margin", type=float, default=0.1, help="Margin in inches")
+    parser.add_argument("--spacing", type=float, default=0.1, help="Spacing in inches")
+    parser.add_argument("--output-dir", type=Path, default=Path("output"))
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for multiple inputs (default: CPU count)")
+    args = parser.parse_args()
+
+    specs = load_specs(args.specs)
+    if args.country not in specs:
+        raise SystemExit(f"Unknown country '{args.country}'. Available: {', '.join(specs)}")
+    spec = specs[args.country]
 
-    print(f"Saved cropped photo: {photo_path}")
-    if actual_fill is not None:
-        print(f"Head frame coverage: {actual_fill:.0%} (target {spec.head_height_ratio:.0%})")
+    inputs = _expand_inputs(args.input)
+    if not inputs:
+        raise SystemExit("No input photos found.")
+    if len(inputs) == 1:
+        jobs = [(inputs[0], args.country.lower())]
     else:
-        print(f"Head frame coverage (target): {spec.head_height_ratio:.0%}")
-    print(f"Saved print sheet: {sheet_path}")
+        # Prefix outputs with each input's stem so a batch doesn't overwrite itself.
+        jobs = list(zip(inputs, _batch_output_prefixes(inputs, args.country.lower())))
+
+    def report(photo_path: Path, sheet_path: Path, actual_fill: Optional[float]) -> None:
+        print(f"Saved cropped photo: {photo_path}")
+        if actual_fill is not None:
+            print(f"Head frame coverage: {actual_fill:.0%} (target {spec.head_height_ratio:.0%})")
+        else:
+            print(f"Head frame coverage (target): {spec.head_height_ratio:.0%}")
+        print(f"Saved print sheet: {sheet_path}")
+
+    if len(jobs) == 1:
+        report(*process_file(jobs[0][0], spec, args, jobs[0][1]))
+        return
+
+    # Each photo is independent, so fan the batch out across processes; this also
+    # gives every worker its own cascade/segmenter state.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    failures = 0
+    max_workers = min(len(jobs), args.workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(process_file, path, spec, args, prefix): path for path, prefix in jobs}
+        # Report photos as they finish rather than in submission order.
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                report(*future.result())
+            # Count any worker failure (cv2.error, OSError, a broken pool, or the
+            # SystemExit raised for unreadable inputs) and keep reporting the rest.
+            except (Exception, SystemExit) as exc:
+                failures += 1
+                print(f"Failed {path}: {exc}")
+    if failures:
+        raise SystemExit(f"{failures} of {len(jobs)} photos failed.")
 
 
 if __name__ == "__main__":
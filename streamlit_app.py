@@ -6,7 +6,8 @@ import cv2
 import numpy as np
 from pathlib import Path
 from PIL import Image
-import io
+import hashlib
+from dataclasses import astuple
 
 from background_engine import BACKGROUND_ENGINES, selected_background_engine
 from crop_engine import (
@@ -20,10 +21,11 @@ from photo_service import (
     build_print_sheet_for_photo,
     clean_id_card_photo,
     decode_image_bytes,
+    encode_jpeg_bytes,
     encode_png_bytes,
 )
 from print_sheet import LayoutSpec, parse_layout
-from process_photo import detect_face, crop_to_spec, get_foreground_alpha, replace_background
+from process_photo import compute_output_size_px, detect_face, crop_to_spec, get_foreground_alpha, replace_background
 from spec_loader import load_photo_specs
 
 try:
@@ -32,6 +34,33 @@ except ImportError:
     streamlit_image_coordinates = None
 
 
+_PREVIEW_MAX_SIDE = 800
+
+
+def _array_digest(image: np.ndarray) -> str:
+    """Cache-key digest of an image array's shape and pixels.
+
+    Hashing the bytes alone would let a transposed or reshaped array with the same
+    pixel count collide with the original.
+    """
+    digest = hashlib.sha1(repr(image.shape).encode())
+    digest.update(np.ascontiguousarray(image))
+    return digest.hexdigest()
+
+
+def _preview(image: Image.Image) -> Image.Image:
+    """Downscaled copy for st.image, which re-encodes every shown image on each rerun.
+
+    Full-resolution images are kept for the download buttons.
+    """
+    w, h = image.size
+    scale = _PREVIEW_MAX_SIDE / max(w, h)
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return image.resize(size, Image.BICUBIC, reducing_gap=2.0)
+
+
 def _border_stats(image_bgr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     h, w = image_bgr.shape[:2]
     border = np.concatenate(
@@ -95,6 +124,109 @@ def _draw_horizontal_guide(
     cv2.putText(image, label, (x1 + 6, max(14, y - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
 
 
+# The framing guide illustrations are static; draw each once per process rather
+# than on every rerun.
+@st.cache_resource(show_spinner=False)
+def _profile_example_image() -> Image.Image:
+    # Create simple visual guide
+    example_img = np.full((400, 300, 3), 240, dtype=np.uint8)
+    # Head and shoulders outline
+    cv2.rectangle(example_img, (50, 30), (250, 280), (50, 150, 50), 3)
+    cv2.putText(example_img, "Top of head", (70, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 200, 0), 1)
+    cv2.putText(example_img, "Mid-chest", (80, 310), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 200, 0), 1)
+    cv2.line(example_img, (150, 150), (150, 150), (100, 200, 100), 3)  # Eyes line
+    return Image.fromarray(example_img)
+
+
+@st.cache_resource(show_spinner=False)
+def _profile_mistake_image() -> Image.Image:
+    mistake_img = np.full((400, 300, 3), 240, dtype=np.uint8)
+    cv2.rectangle(mistake_img, (30, 80), (270, 350), (200, 50, 50), 3)
+    cv2.putText(mistake_img, "Too much forehead", (50, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 50, 50), 1)
+    cv2.putText(mistake_img, "Too much body", (80, 390), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 50, 50), 1)
+    return Image.fromarray(mistake_img)
+
+
+@st.cache_resource(show_spinner=False)
+def _manual_good_guide_image() -> Image.Image:
+    good_guide = np.full((300, 200, 3), 240, dtype=np.uint8)
+    # Draw head area
+    cv2.ellipse(good_guide, (100, 80), (40, 45), 0, 0, 360, (100, 100, 100), 2)
+    # Draw shoulders
+    cv2.line(good_guide, (60, 120), (140, 120), (100, 100, 100), 3)
+    # Draw frame
+    cv2.rectangle(good_guide, (40, 30), (160, 260), (0, 200, 0), 3)
+    # Labels
+    cv2.putText(good_guide, "Top", (70, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 150, 0), 1)
+    cv2.putText(good_guide, "Eyes", (95, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 150, 0), 1)
+    cv2.putText(good_guide, "Shoulders", (55, 135), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 150, 0), 1)
+    cv2.putText(good_guide, "Bottom", (70, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 150, 0), 1)
+    return Image.fromarray(good_guide)
+
+
+@st.cache_resource(show_spinner=False)
+def _manual_bad_guide_image() -> Image.Image:
+    bad_guide = np.full((300, 200, 3), 240, dtype=np.uint8)
+    # Too much forehead
+    cv2.rectangle(bad_guide, (40, 10), (160, 200), (200, 50, 50), 2)
+    cv2.putText(bad_guide, "Bad: Too much", (50, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 50, 50), 1)
+    cv2.putText(bad_guide, "forehead", (65, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 50, 50), 1)
+    # Cut off head
+    cv2.rectangle(bad_guide, (40, 60), (160, 280), (200, 150, 50), 2)
+    cv2.putText(bad_guide, "Bad: Head cut", (45, 300), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 150, 50), 1)
+    return Image.fromarray(bad_guide)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_photo_specs(specs_path: str, mtime_ns: int) -> dict:
+    # Streamlit reruns the script on every interaction; parse specs.json only when
+    # it changes (the modification time is part of the cache key). Specs are
+    # frozen, so the one dict is shared instead of unpickling a copy per rerun.
+    return load_photo_specs(Path(specs_path))
+
+
+# Upload-derived stages are keyed on a digest of the upload (computed once per
+# rerun) rather than the raw bytes, so Streamlit doesn't rehash megabytes per call;
+# underscore-prefixed arguments are excluded from the cache key.
+@st.cache_data(show_spinner=False, max_entries=4)
+def _cached_decode_upload(upload_digest: str, _file_bytes: bytes, min_side: int | None) -> np.ndarray:
+    return decode_image_bytes(_file_bytes, min_side=min_side)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_detect_upload_face(
+    upload_digest: str, _file_bytes: bytes, min_side: int | None
+) -> tuple[tuple[int, int, int, int], tuple[int, int]]:
+    return detect_face(_cached_decode_upload(upload_digest, _file_bytes, min_side))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_crop_upload(
+    upload_digest: str,
+    _file_bytes: bytes,
+    min_side: int | None,
+    country: str,
+    _spec,
+    spec_fields: tuple,
+    dpi: int,
+    pad_rgb: tuple[int, int, int],
+    enforce_target: bool,
+) -> np.ndarray:
+    # spec_fields (astuple of _spec) keys the cache on the spec's values, so an
+    # edited specs.json reloaded by _cached_photo_specs doesn't serve stale crops.
+    image_bgr = _cached_decode_upload(upload_digest, _file_bytes, min_side)
+    bbox, eye_point = _cached_detect_upload_face(upload_digest, _file_bytes, min_side)
+    return crop_to_spec(
+        image_bgr,
+        bbox,
+        eye_point,
+        _spec,
+        dpi,
+        background_rgb=pad_rgb,
+        enforce_target=enforce_target,
+    )
+
+
 @st.cache_data(show_spinner=False, max_entries=16)
 def _cached_replace_background(
     image_png: bytes,
@@ -118,6 +250,74 @@ def _cached_replace_background(
         )
 
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_head_fill(
+    photo_digest: str,
+    _image_bgr: np.ndarray,
+    engine: str,
+    bg_tolerance: float,
+    face_protect: float,
+) -> float | None:
+    # The standard details metric re-detects the face on the final photo; key it on
+    # the photo's digest so reruns that don't change the photo skip that detection.
+    try:
+        bbox_cropped, _ = detect_face(_image_bgr)
+        bx, by, bw, bh = bbox_cropped
+        est_top = int(round(by - bh * 0.15))
+        est_bottom = int(round(by + bh))
+        head_h = max(1, est_bottom - est_top)
+        final_h = max(1, _image_bgr.shape[0])
+        return head_h / final_h
+    except Exception:
+        try:
+            with selected_background_engine(engine):
+                mask_crop = get_foreground_alpha(
+                    _image_bgr,
+                    face_bbox=None,
+                    bbox_expand_x=0.2,
+                    bbox_expand_y=0.3,
+                    bg_tolerance=bg_tolerance,
+                    face_protect=face_protect,
+                )
+            ys, xs = np.where(mask_crop > 40)
+            if ys.size > 0:
+                head_h = max(1, int(ys.max() - ys.min()))
+                final_h = max(1, _image_bgr.shape[0])
+                return head_h / final_h
+        except Exception:
+            pass
+    return None
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_print_sheet(
+    photo_digest: str,
+    _photo: Image.Image,
+    layout_in: tuple[float, float],
+    dpi: int,
+    margin_in: float,
+    spacing_in: float,
+    copies: int,
+    draw_guides: bool,
+) -> tuple[np.ndarray, bytes]:
+    # Most reruns (toggles, expanders) leave the photo and layout unchanged; reuse
+    # the full-resolution sheet and its download JPEG instead of re-tiling and
+    # re-encoding them. Cached as a resource so hits share one array across reruns
+    # and sessions rather than unpickling a copy; it is returned read-only.
+    sheet = build_print_sheet_for_photo(
+        photo=_photo,
+        layout=LayoutSpec(width_in=layout_in[0], height_in=layout_in[1]),
+        dpi=dpi,
+        margin_in=margin_in,
+        spacing_in=spacing_in,
+        copies=copies,
+        draw_guides=draw_guides,
+    )
+    sheet_rgb = np.asarray(sheet)
+    sheet_rgb.setflags(write=False)
+    return sheet_rgb, encode_jpeg_bytes(cv2.cvtColor(sheet_rgb, cv2.COLOR_RGB2BGR))
+
+
 # Configure page
 st.set_page_config(
     page_title="ID Photo & Card Studio",
@@ -231,7 +431,7 @@ st.markdown("""
 
 # Load specs early
 specs_path = Path(__file__).resolve().parent / "specs.json"
-specs = load_photo_specs(specs_path)
+specs = _cached_photo_specs(str(specs_path), specs_path.stat().st_mtime_ns)
 
 # Placed at the very top of the sidebar (rather than the main content area) since it's the
 # single control that governs every other setting below it.
@@ -278,22 +478,22 @@ if document_type == "Passport / Visa photo":
                 st.markdown("**Popular immigration destinations:**")
                 major_codes = ["US_PASSPORT", "US_VISA", "CA_PASSPORT", "CA_VISA", "UK_PASSPORT", "UK_VISA", 
                               "AU_PASSPORT", "AU_VISA", "JP_PASSPORT", "JP_VISA", "SG_PASSPORT", "SG_VISA"]
-                for code in major_codes:
-                    if code in specs:
-                        spec = specs[code]
-                        w_in = spec.width_in if hasattr(spec, 'width_in') else spec.width_in
-                        h_in = spec.height_in if hasattr(spec, 'height_in') else spec.height_in
-                        st.write(f"**{spec.name}** • {w_in}\" × {h_in}\" | Head: {spec.head_height_ratio:.0%}")
+                # One markdown element per list rather than one per country: each st.*
+                # call is a separate element re-sent to the browser on every rerun.
+                major_specs = [specs[code] for code in major_codes if code in specs]
+                st.markdown(
+                    "\n\n".join(
+                        f"**{spec.name}** • {spec.width_in}\" × {spec.height_in}\" | Head: {spec.head_height_ratio:.0%}"
+                        for spec in major_specs
+                    )
+                )
 
             with tab_all:
                 st.markdown(f"**All {len(specs)} specifications:**")
                 cols_display = st.columns(2)
-                for idx, (code, spec) in enumerate(specs.items()):
-                    col = cols_display[idx % 2]
-                    with col:
-                        w_in = spec.width_in if hasattr(spec, 'width_in') else spec.width_in
-                        h_in = spec.height_in if hasattr(spec, 'height_in') else spec.height_in
-                        st.caption(f"{spec.name} • {w_in}\" × {h_in}\"")
+                spec_captions = [f"{spec.name} • {spec.width_in}\" × {spec.height_in}\"" for spec in specs.values()]
+                for col, captions in zip(cols_display, (spec_captions[0::2], spec_captions[1::2])):
+                    col.caption("  \n".join(captions))
 
         with col_req3:
             st.markdown("### Best Practices")
@@ -322,22 +522,11 @@ if document_type == "Passport / Visa photo":
         col_example1, col_example2 = st.columns(2)
         with col_example1:
             st.markdown("**GOOD PROFILE**")
-            # Create simple visual guide
-            example_img = np.ones((400, 300, 3), dtype=np.uint8) * 240
-            # Head and shoulders outline
-            cv2.rectangle(example_img, (50, 30), (250, 280), (50, 150, 50), 3)
-            cv2.putText(example_img, "Top of head", (70, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 200, 0), 1)
-            cv2.putText(example_img, "Mid-chest", (80, 310), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 200, 0), 1)
-            cv2.line(example_img, (150, 150), (150, 150), (100, 200, 100), 3)  # Eyes line
-            st.image(Image.fromarray(example_img), use_container_width=True)
+            st.image(_profile_example_image(), use_container_width=True)
 
         with col_example2:
             st.markdown("**COMMON MISTAKES**")
-            mistake_img = np.ones((400, 300, 3), dtype=np.uint8) * 240
-            cv2.rectangle(mistake_img, (30, 80), (270, 350), (200, 50, 50), 3)
-            cv2.putText(mistake_img, "Too much forehead", (50, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 50, 50), 1)
-            cv2.putText(mistake_img, "Too much body", (80, 390), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 50, 50), 1)
-            st.image(Image.fromarray(mistake_img), use_container_width=True)
+            st.image(_profile_mistake_image(), use_container_width=True)
 
 # Sidebar controls
 with st.sidebar:
@@ -526,8 +715,18 @@ if document_type == "Passport / Visa photo":
             # Read the uploaded image. Use getvalue() rather than read(): Streamlit can
             # return the same UploadedFile across reruns, and read() would come back
             # empty/truncated once its position has already been consumed once.
+            # Cropping modes only need a few times the output size (a face spanning a
+            # third of the frame still maps ~1:1), so let large JPEGs shrink on load.
+            # Background-only keeps the original framing and resolution.
+            spec = specs[country]
+            if photo_situation == "Background only (no crop)":
+                decode_min_side = None
+            else:
+                decode_min_side = 3 * max(compute_output_size_px(spec, dpi))
+            upload_bytes = uploaded_file.getvalue()
+            upload_digest = hashlib.sha1(upload_bytes).hexdigest()
             try:
-                image_bgr = decode_image_bytes(uploaded_file.getvalue())
+                image_bgr = _cached_decode_upload(upload_digest, upload_bytes, decode_min_side)
             except ValueError as exc:
                 st.error(str(exc))
                 image_bgr = None
@@ -546,88 +745,93 @@ if document_type == "Passport / Visa photo":
                     transparent_bg = replace_bg and (background_color_choice == "Transparent (PNG)")
                     background_rgb = background_color_options.get(background_color_choice)
                     if background_rgb in (None, "transparent"):
-                        background_rgb = specs[country].background_rgb
-                    pad_rgb = background_rgb if replace_bg else specs[country].background_rgb
-
-                    # Detect face
-                    bbox, eye_point = detect_face(image_bgr)
-
-                    if background_only:
-                        # Keep the original framing and size; only the background is touched.
-                        cropped_bgr = image_bgr.copy()
-                    else:
-                        # Crop to spec
-                        cropped_bgr = crop_to_spec(
-                            image_bgr,
-                            bbox,
-                            eye_point,
-                            specs[country],
-                            dpi,
-                            background_rgb=pad_rgb,
-                            enforce_target=bool(enforce_target),
-                        )
+                        background_rgb = spec.background_rgb
+                    pad_rgb = background_rgb if replace_bg else spec.background_rgb
+
+                    # Detect face (cached per upload, so widget changes skip it)
+                    bbox, eye_point = _cached_detect_upload_face(upload_digest, upload_bytes, decode_min_side)
+
+                    # Manual adjustment builds its own crop from the detected face below,
+                    # so only the other modes run the auto crop and background pass here.
+                    if processing_mode != "Manual Adjustment":
+                        if background_only:
+                            # Keep the original framing and size; only the background is touched.
+                            cropped_bgr = image_bgr.copy()
+                        else:
+                            # Crop to spec
+                            cropped_bgr = _cached_crop_upload(
+                                upload_digest,
+                                upload_bytes,
+                                decode_min_side,
+                                country,
+                                spec,
+                                astuple(spec),
+                                dpi,
+                                tuple(pad_rgb),
+                                bool(enforce_target),
+                            )
 
-                    # Replace after cropping so the cutout edge is generated at final resolution.
-                    if replace_bg and not transparent_bg:
-                        try:
-                            bbox_cropped, _ = detect_face(cropped_bgr)
-                        except Exception:
-                            bbox_cropped = None
-                        cropped_bgr = _cached_replace_background(
-                            encode_png_bytes(cropped_bgr),
-                            tuple(background_rgb),
-                            tuple(int(v) for v in bbox_cropped) if bbox_cropped is not None else None,
-                            float(bg_tolerance),
-                            float(face_protect),
-                            background_engine,
-                        )
+                        # Replace after cropping so the cutout edge is generated at final resolution.
+                        if replace_bg and not transparent_bg:
+                            try:
+                                bbox_cropped, _ = detect_face(cropped_bgr)
+                            except Exception:
+                                bbox_cropped = None
+                            cropped_bgr = _cached_replace_background(
+                                encode_png_bytes(cropped_bgr),
+                                tuple(background_rgb),
+                                tuple(int(v) for v in bbox_cropped) if bbox_cropped is not None else None,
+                                float(bg_tolerance),
+                                float(face_protect),
+                                background_engine,
+                            )
 
-                    # Optional debug mask preview
-                    if replace_bg and show_mask_debug:
-                        with st.expander("Background Mask Preview", expanded=True):
-                            dbg_col1, dbg_col2 = st.columns(2)
-                            with dbg_col1:
-                                try:
-                                    with selected_background_engine(background_engine):
-                                        mask_orig = get_foreground_alpha(
-                                            image_bgr,
-                                            face_bbox=bbox,
-                                            bbox_expand_x=0.4,
-                                            bbox_expand_y=0.6,
-                                            bg_tolerance=float(bg_tolerance),
-                                            face_protect=float(face_protect),
-                                        )
-                                    fg_ratio = float(np.mean(mask_orig > 0))
-                                    mean, std = _border_stats(image_bgr)
-                                    st.caption(f"Original mask fg: {fg_ratio:.2f} | border mean: {mean.astype(int)} | border std: {std.astype(int)} | white=kept")
-                                    st.image(Image.fromarray(mask_orig), caption="Original mask", use_container_width=True)
-                                except Exception as exc:
-                                    st.error(f"Mask debug failed (original): {exc}")
-                            with dbg_col2:
-                                try:
-                                    bbox_dbg, _ = detect_face(cropped_bgr)
-                                except Exception:
-                                    bbox_dbg = None
-                                try:
-                                    with selected_background_engine(background_engine):
-                                        mask_crop = get_foreground_alpha(
-                                            cropped_bgr,
-                                            face_bbox=bbox_dbg,
-                                            bbox_expand_x=0.2,
-                                            bbox_expand_y=0.3,
-                                            bg_tolerance=float(bg_tolerance),
-                                            face_protect=float(face_protect),
-                                        )
-                                    fg_ratio = float(np.mean(mask_crop > 0))
-                                    mean, std = _border_stats(cropped_bgr)
-                                    st.caption(f"Cropped mask fg: {fg_ratio:.2f} | border mean: {mean.astype(int)} | border std: {std.astype(int)} | white=kept")
-                                    st.image(Image.fromarray(mask_crop), caption="Cropped mask", use_container_width=True)
-                                except Exception as exc:
-                                    st.error(f"Mask debug failed (cropped): {exc}")
-
-                    # Convert to RGB for display
-                    cropped_rgb = cv2.cvtColor(cropped_bgr, cv2.COLOR_BGR2RGB)
-                    cropped_pil = Image.fromarray(cropped_rgb)
+                        # Optional debug mask preview
+                        if replace_bg and show_mask_debug:
+                            with st.expander("Background Mask Preview", expanded=True):
+                                dbg_col1, dbg_col2 = st.columns(2)
+                                with dbg_col1:
+                                    try:
+                                        with selected_background_engine(background_engine):
+                                            mask_orig = get_foreground_alpha(
+                                                image_bgr,
+                                                face_bbox=bbox,
+                                                bbox_expand_x=0.4,
+                                                bbox_expand_y=0.6,
+                                                bg_tolerance=float(bg_tolerance),
+                                                face_protect=float(face_protect),
+                                            )
+                                        fg_ratio = float(np.mean(mask_orig > 0))
+                                        mean, std = _border_stats(image_bgr)
+                                        st.caption(f"Original mask fg: {fg_ratio:.2f} | border mean: {mean.astype(int)} | border std: {std.astype(int)} | white=kept")
+                                        st.image(_preview(Image.fromarray(mask_orig)), caption="Original mask", use_container_width=True)
+                                    except Exception as exc:
+                                        st.error(f"Mask debug failed (original): {exc}")
+                                with dbg_col2:
+                                    try:
+                                        bbox_dbg, _ = detect_face(cropped_bgr)
+                                    except Exception:
+                                        bbox_dbg = None
+                                    try:
+                                        with selected_background_engine(background_engine):
+                                            mask_crop = get_foreground_alpha(
+                                                cropped_bgr,
+                                                face_bbox=bbox_dbg,
+                                                bbox_expand_x=0.2,
+                                                bbox_expand_y=0.3,
+                                                bg_tolerance=float(bg_tolerance),
+                                                face_protect=float(face_protect),
+                                            )
+                                        fg_ratio = float(np.mean(mask_crop > 0))
+                                        mean, std = _border_stats(cropped_bgr)
+                                        st.caption(f"Cropped mask fg: {fg_ratio:.2f} | border mean: {mean.astype(int)} | border std: {std.astype(int)} | white=kept")
+                                        st.image(_preview(Image.fromarray(mask_crop)), caption="Cropped mask", use_container_width=True)
+                                    except Exception as exc:
+                                        st.error(f"Mask debug failed (cropped): {exc}")
+
+                        # Convert to RGB once; preview, print sheet and download all share it.
+                        cropped_rgb = cv2.cvtColor(cropped_bgr, cv2.COLOR_BGR2RGB)
+                        cropped_pil = Image.fromarray(cropped_rgb)
 
                 # Manual adjustment mode
                 if processing_mode == "Manual Adjustment":
@@ -679,31 +883,11 @@ if document_type == "Passport / Visa photo":
                         col_img1, col_img2 = st.columns(2)
                         with col_img1:
                             st.markdown("**Good Profile Example:**")
-                            good_guide = np.ones((300, 200, 3), dtype=np.uint8) * 240
-                            # Draw head area
-                            cv2.ellipse(good_guide, (100, 80), (40, 45), 0, 0, 360, (100, 100, 100), 2)
-                            # Draw shoulders
-                            cv2.line(good_guide, (60, 120), (140, 120), (100, 100, 100), 3)
-                            # Draw frame
-                            cv2.rectangle(good_guide, (40, 30), (160, 260), (0, 200, 0), 3)
-                            # Labels
-                            cv2.putText(good_guide, "Top", (70, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 150, 0), 1)
-                            cv2.putText(good_guide, "Eyes", (95, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 150, 0), 1)
-                            cv2.putText(good_guide, "Shoulders", (55, 135), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 150, 0), 1)
-                            cv2.putText(good_guide, "Bottom", (70, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 150, 0), 1)
-                            st.image(Image.fromarray(good_guide), use_container_width=True)
+                            st.image(_manual_good_guide_image(), use_container_width=True)
 
                         with col_img2:
                             st.markdown("**Common Issues:**")
-                            bad_guide = np.ones((300, 200, 3), dtype=np.uint8) * 240
-                            # Too much forehead
-                            cv2.rectangle(bad_guide, (40, 10), (160, 200), (200, 50, 50), 2)
-                            cv2.putText(bad_guide, "Bad: Too much", (50, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 50, 50), 1)
-                            cv2.putText(bad_guide, "forehead", (65, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 50, 50), 1)
-                            # Cut off head
-                            cv2.rectangle(bad_guide, (40, 60), (160, 280), (200, 150, 50), 2)
-                            cv2.putText(bad_guide, "Bad: Head cut", (45, 300), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 150, 50), 1)
-                            st.image(Image.fromarray(bad_guide), use_container_width=True)
+                            st.image(_manual_bad_guide_image(), use_container_width=True)
 
                     st.markdown("---")
 
@@ -715,10 +899,10 @@ if document_type == "Passport / Visa photo":
                     )
 
                     # Get target photo specifications
-                    spec = specs[country]
 
-                    # Use original image without zoom
-                    image_zoomed = image_bgr.copy()
+                    # Use original image without zoom. Only read (and sliced) below; the
+                    # preview overlay draws on its own copy, so no full-frame copy is needed.
+                    image_zoomed = image_bgr
                     h_zoom, w_zoom = image_zoomed.shape[:2]
 
                     # Controls sit directly beside the preview they affect (not above it), so
@@ -777,7 +961,6 @@ if document_type == "Passport / Visa photo":
                     move_offset_y = getattr(st.session_state, 'move_offset_y', 0)
 
                     # Start manual adjustment from the detected face/eyes and selected spec.
-                    spec = specs[country]
                     base_x1, base_y1, base_x2, base_y2 = default_manual_crop_rect(
                         image_zoomed.shape,
                         bbox,
@@ -844,9 +1027,6 @@ if document_type == "Passport / Visa photo":
                         result[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = manual_cropped_bgr
                         manual_cropped_bgr = result
 
-                    manual_cropped_rgb = cv2.cvtColor(manual_cropped_bgr, cv2.COLOR_BGR2RGB)
-                    cropped_pil = Image.fromarray(manual_cropped_rgb)
-
                     # Update cropped_bgr to use manual adjustment
                     cropped_bgr = manual_cropped_bgr
 
@@ -870,6 +1050,10 @@ if document_type == "Passport / Visa photo":
                             # If background replacement fails here, keep the manual crop as-is
                             pass
 
+                    # Convert the final manual result to RGB once for preview, sheet and download.
+                    cropped_rgb = cv2.cvtColor(cropped_bgr, cv2.COLOR_BGR2RGB)
+                    cropped_pil = Image.fromarray(cropped_rgb)
+
                     # Validate estimated feature positioning against spec-driven targets.
                     crop_h = max(1, y2 - y1)
                     crop_w = max(1, x2 - x1)
@@ -888,47 +1072,58 @@ if document_type == "Passport / Visa photo":
                     # Show live preview (optional overlay), directly beside the controls above.
                     with preview_col1:
                         st.markdown("#### Live Preview")
+                        # The preview is shown at most _PREVIEW_MAX_SIDE px wide, so shrink the
+                        # frame first (INTER_AREA) and draw guides on that small copy instead of
+                        # copying, annotating and converting the full-resolution upload.
+                        preview_scale = min(1.0, _PREVIEW_MAX_SIDE / max(h_zoom, w_zoom))
+                        if preview_scale < 1.0:
+                            img_display = cv2.resize(
+                                image_zoomed, None, fx=preview_scale, fy=preview_scale, interpolation=cv2.INTER_AREA
+                            )
+                        else:
+                            img_display = image_zoomed.copy()
                         if show_guides:
                             st.markdown("*Green box shows the area that will be cropped. Guide lines help position key features correctly.*")
-                            # Draw rectangle showing crop area on zoomed image
-                            img_display = image_zoomed.copy()
+                            # Draw rectangle showing crop area on the preview-sized image
+                            px1, py1, px2, py2 = (int(round(v * preview_scale)) for v in (x1, y1, x2, y2))
 
                             # Draw outer rectangle with a thinner border
-                            cv2.rectangle(img_display, (x1, y1), (x2, y2), (0, 200, 0), 2)
+                            cv2.rectangle(img_display, (px1, py1), (px2, py2), (0, 200, 0), 2)
 
                             # Add guide lines for correct positioning
                             crop_h = y2 - y1
                             crop_w = x2 - x1
-                            tolerance_px = max(2, int(crop_h * 0.025))
+                            preview_crop_h = py2 - py1
+                            tolerance_px = max(2, int(preview_crop_h * 0.025))
 
                             # Top of head guide
-                            head_top_y = y1 + int(crop_h * spec.top_margin_ratio)
-                            _draw_horizontal_guide(img_display, x1, x2, head_top_y, "Head top", (60, 170, 60), tolerance_px)
+                            head_top_y = py1 + int(preview_crop_h * spec.top_margin_ratio)
+                            _draw_horizontal_guide(img_display, px1, px2, head_top_y, "Head top", (60, 170, 60), tolerance_px)
 
                             # Eye line tolerance zone
-                            eye_line_y = y1 + int(crop_h * (1 - specs[country].eye_line_from_bottom_ratio))
-                            _draw_horizontal_guide(img_display, x1, x2, eye_line_y, "Eyes", (200, 120, 40), tolerance_px)
+                            eye_line_y = py1 + int(preview_crop_h * (1 - spec.eye_line_from_bottom_ratio))
+                            _draw_horizontal_guide(img_display, px1, px2, eye_line_y, "Eyes", (200, 120, 40), tolerance_px)
 
                             # Head-size guide
-                            head_bottom_y = y1 + int(crop_h * min(0.95, spec.top_margin_ratio + spec.head_height_ratio))
-                            _draw_horizontal_guide(img_display, x1, x2, head_bottom_y, "Chin / head bottom", (120, 120, 220), tolerance_px)
+                            head_bottom_y = py1 + int(preview_crop_h * min(0.95, spec.top_margin_ratio + spec.head_height_ratio))
+                            _draw_horizontal_guide(img_display, px1, px2, head_bottom_y, "Chin / head bottom", (120, 120, 220), tolerance_px)
 
                             # Add center vertical line
-                            center_x_line = (x1 + x2) // 2
-                            cv2.line(img_display, (center_x_line, y1), (center_x_line, y2), (200, 200, 200), 1)
-                            cv2.putText(img_display, "Center", (center_x_line + 5, y1 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (190, 190, 190), 1)
+                            center_x_line = (px1 + px2) // 2
+                            cv2.line(img_display, (center_x_line, py1), (center_x_line, py2), (200, 200, 200), 1)
+                            cv2.putText(img_display, "Center", (center_x_line + 5, py1 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (190, 190, 190), 1)
 
                             # Add corner markers
                             corner_size = 20
-                            cv2.line(img_display, (x1, y1), (x1 + corner_size, y1), (0, 200, 255), 3)
-                            cv2.line(img_display, (x1, y1), (x1, y1 + corner_size), (0, 200, 255), 3)
+                            cv2.line(img_display, (px1, py1), (px1 + corner_size, py1), (0, 200, 255), 3)
+                            cv2.line(img_display, (px1, py1), (px1, py1 + corner_size), (0, 200, 255), 3)
 
                             img_display_rgb = cv2.cvtColor(img_display, cv2.COLOR_BGR2RGB)
                             st.image(Image.fromarray(img_display_rgb), 
                                     caption=f"Original Image - Crop with Position Guides",
                                     use_container_width=True)
                         else:
-                            img_display_rgb = cv2.cvtColor(image_zoomed, cv2.COLOR_BGR2RGB)
+                            img_display_rgb = cv2.cvtColor(img_display, cv2.COLOR_BGR2RGB)
                             st.image(Image.fromarray(img_display_rgb), 
                                     caption="Original Image",
                                     use_container_width=True)
@@ -974,7 +1169,7 @@ if document_type == "Passport / Visa photo":
                     with preview_col2:
                         st.markdown("#### Final Result")
                         # Display final photo (optional guide overlay)
-                        final_photo_display = cv2.cvtColor(cropped_bgr, cv2.COLOR_BGR2RGB)
+                        final_photo_display = cropped_rgb
                         if show_guides:
                             # Add guide lines to final photo as well (Head Top / Eyes / Shoulders)
                             final_display = final_photo_display.copy()
@@ -986,7 +1181,7 @@ if document_type == "Passport / Visa photo":
                             _draw_horizontal_guide(final_display, 0, final_w, head_top_final, "Head top", (60, 170, 60), tolerance_px_final)
 
                             # Eye line tolerance zone
-                            eye_line_final = int(final_h * (1 - specs[country].eye_line_from_bottom_ratio))
+                            eye_line_final = int(final_h * (1 - spec.eye_line_from_bottom_ratio))
                             _draw_horizontal_guide(final_display, 0, final_w, eye_line_final, "Eyes", (200, 120, 40), tolerance_px_final)
 
                             # Head-size guide
@@ -1000,14 +1195,15 @@ if document_type == "Passport / Visa photo":
                             st.image(Image.fromarray(final_photo_display), 
                                     caption="Final ID Photo",
                                     use_container_width=True)
-                    st.caption(f"{w_px:,} x {h_px:,} px | {specs[country].width_in}\" x {specs[country].height_in}\" @ {dpi} DPI")
+                    st.caption(f"{w_px:,} x {h_px:,} px | {spec.width_in}\" x {spec.height_in}\" @ {dpi} DPI")
 
                 # Generate print sheet (for both automatic and manual modes; skipped for background-only
                 # output since that isn't a fixed passport/visa size to tile).
-                sheet = None
+                sheet_rgb = None
+                sheet_jpeg = None
                 effective_copies = 0
                 if not background_only:
-                    sheet_photo = cropped_pil.convert("RGB")
+                    sheet_photo = cropped_pil
                     max_copies = _max_copies_for_layout(
                         photo_w=sheet_photo.size[0],
                         photo_h=sheet_photo.size[1],
@@ -1018,14 +1214,15 @@ if document_type == "Passport / Visa photo":
                     )
                     effective_copies = max_copies
                     st.info(f"Copies per sheet (auto): {effective_copies}")
-                    sheet = build_print_sheet_for_photo(
-                        photo=sheet_photo,
-                        layout=layout,
-                        dpi=dpi,
-                        margin_in=margin,
-                        spacing_in=spacing,
-                        copies=effective_copies,
-                        draw_guides=show_sheet_guides,
+                    sheet_rgb, sheet_jpeg = _cached_print_sheet(
+                        _array_digest(cropped_rgb),
+                        sheet_photo,
+                        (float(layout.width_in), float(layout.height_in)),
+                        dpi,
+                        float(margin),
+                        float(spacing),
+                        effective_copies,
+                        bool(show_sheet_guides),
                     )
 
                 # Display results
@@ -1039,9 +1236,11 @@ if document_type == "Passport / Visa photo":
 
                 with col_photo:
                     st.subheader("Photo (background only)" if background_only else "Cropped Photo")
-                    spec = specs[country]
                     w_in, h_in = spec.width_in, spec.height_in
 
+                    # Full-resolution array the download is encoded from (BGRA when transparent).
+                    photo_bgr = cropped_bgr
+
                     # If transparent background requested, build RGBA output for display/download
                     if transparent_bg:
                         try:
@@ -1058,18 +1257,17 @@ if document_type == "Passport / Visa photo":
                                 bg_tolerance=float(bg_tolerance),
                                 face_protect=float(face_protect),
                             )
-                        rgba = cv2.cvtColor(cropped_bgr, cv2.COLOR_BGR2RGBA)
-                        rgba[:, :, 3] = fg_mask
-                        cropped_pil = Image.fromarray(rgba)
+                        photo_bgr = cv2.cvtColor(cropped_bgr, cv2.COLOR_BGR2BGRA)
+                        photo_bgr[:, :, 3] = fg_mask
+                        cropped_pil = Image.fromarray(cv2.cvtColor(photo_bgr, cv2.COLOR_BGRA2RGBA))
 
                     # Display cropped photo without text overlay
                     if transparent_bg:
                         caption = "Background removed (transparent)" if background_only else f"{w_in}\" x {h_in}\" (transparent)"
-                        st.image(cropped_pil, caption=caption, use_container_width=True)
+                        st.image(_preview(cropped_pil), caption=caption, use_container_width=True)
                     else:
-                        cropped_display = cv2.cvtColor(cropped_bgr, cv2.COLOR_BGR2RGB)
                         caption = "Background removed" if background_only else f"{w_in}\" x {h_in}\""
-                        st.image(Image.fromarray(cropped_display), caption=caption, use_container_width=True)
+                        st.image(_preview(cropped_pil), caption=caption, use_container_width=True)
 
                     # Photo size info
                     w_px, h_px = cropped_pil.size
@@ -1078,16 +1276,14 @@ if document_type == "Passport / Visa photo":
                     else:
                         st.caption(f"Size: {w_px:,} x {h_px:,} px @ {dpi} DPI | {country} standard")
 
-                    # Download cropped photo
-                    img_buffer = io.BytesIO()
-                    cropped_pil.save(img_buffer, format="PNG")
+                    # Download cropped photo, encoded once straight from the BGR(A) array
+                    photo_png = encode_png_bytes(photo_bgr)
                     download_name = f"{country.lower()}_photo.png"
                     download_mime = "image/png"
-                    img_buffer.seek(0)
 
                     st.download_button(
                         label="Download photo",
-                        data=img_buffer,
+                        data=photo_png,
                         file_name=download_name,
                         mime=download_mime,
                         use_container_width=True
@@ -1098,22 +1294,16 @@ if document_type == "Passport / Visa photo":
                         st.subheader("Print Sheet")
 
                         # Display print sheet without text overlay
-                        sheet_display = cv2.cvtColor(np.array(sheet), cv2.COLOR_RGB2BGR)
-                        sheet_display_rgb = cv2.cvtColor(sheet_display, cv2.COLOR_BGR2RGB)
-                        st.image(Image.fromarray(sheet_display_rgb), caption=f"Print layout: {layout.width_in}\" x {layout.height_in}\"", use_container_width=True)
+                        st.image(_preview(Image.fromarray(sheet_rgb)), caption=f"Print layout: {layout.width_in}\" x {layout.height_in}\"", use_container_width=True)
 
                         # Sheet size info
-                        sheet_w, sheet_h = sheet.size
+                        sheet_h, sheet_w = sheet_rgb.shape[:2]
                         st.caption(f"Sheet: {sheet_w:,} x {sheet_h:,} px @ {dpi} DPI | {effective_copies} copies")
 
-                        # Download print sheet
-                        sheet_buffer = io.BytesIO()
-                        sheet.save(sheet_buffer, format="JPEG", quality=95)
-                        sheet_buffer.seek(0)
-
+                        # Download print sheet (encoded alongside the cached sheet)
                         st.download_button(
                             label="Download sheet",
-                            data=sheet_buffer,
+                            data=sheet_jpeg,
                             file_name=f"{country.lower()}_sheet_{int(layout.width_in)}x{int(layout.height_in)}.jpg",
                             mime="image/jpeg",
                             use_container_width=True
@@ -1122,43 +1312,23 @@ if document_type == "Passport / Visa photo":
                 with st.expander("Photo standard details", expanded=False):
                     col_specs1, col_specs2, col_specs3 = st.columns(3)
                     with col_specs1:
-                        st.metric("Country", f"{country} - {specs[country].name}")
+                        st.metric("Country", f"{country} - {spec.name}")
                     with col_specs2:
-                        st.metric("Photo Size", f"{specs[country].width_in}\" x {specs[country].height_in}\"")
+                        st.metric("Photo Size", f"{spec.width_in}\" x {spec.height_in}\"")
                     with col_specs3:
                         # Compute actual head fill for the produced photo (use face bbox or alpha mask)
-                        actual_fill = None
-                        try:
-                            bbox_cropped, _ = detect_face(cropped_bgr)
-                            bx, by, bw, bh = bbox_cropped
-                            est_top = int(round(by - bh * 0.15))
-                            est_bottom = int(round(by + bh))
-                            head_h = max(1, est_bottom - est_top)
-                            final_h = max(1, cropped_bgr.shape[0])
-                            actual_fill = head_h / final_h
-                        except Exception:
-                            try:
-                                with selected_background_engine(background_engine):
-                                    mask_crop = get_foreground_alpha(
-                                        cropped_bgr,
-                                        face_bbox=None,
-                                        bbox_expand_x=0.2,
-                                        bbox_expand_y=0.3,
-                                        bg_tolerance=float(bg_tolerance),
-                                        face_protect=float(face_protect),
-                                    )
-                                ys, xs = np.where(mask_crop > 40)
-                                if ys.size > 0:
-                                    head_h = max(1, int(ys.max() - ys.min()))
-                                    final_h = max(1, cropped_bgr.shape[0])
-                                    actual_fill = head_h / final_h
-                            except Exception:
-                                actual_fill = None
+                        actual_fill = _cached_head_fill(
+                            _array_digest(cropped_bgr),
+                            cropped_bgr,
+                            background_engine,
+                            float(bg_tolerance),
+                            float(face_protect),
+                        )
 
                         if actual_fill is not None:
-                            st.metric("Head Frame Coverage", f"{actual_fill:.0%}", delta=f"target {specs[country].head_height_ratio:.0%}")
+                            st.metric("Head Frame Coverage", f"{actual_fill:.0%}", delta=f"target {spec.head_height_ratio:.0%}")
                         else:
-                            st.metric("Head Frame Coverage", f"{specs[country].head_height_ratio:.0%}")
+                            st.metric("Head Frame Coverage", f"{spec.head_height_ratio:.0%}")
 
         except RuntimeError as e:
             st.error(f"Error: {str(e)}")
@@ -1248,26 +1418,24 @@ else:
         col_front, col_back = st.columns(2)
         with col_front:
             st.subheader("Front (cleaned)")
-            st.image(front_pil, use_container_width=True)
+            st.image(_preview(front_pil), use_container_width=True)
         with col_back:
             st.subheader("Back (cleaned)")
-            st.image(back_pil, use_container_width=True)
+            st.image(_preview(back_pil), use_container_width=True)
 
         st.subheader("Print page")
         st.image(
-            sheet,
+            _preview(sheet),
             caption=f"Print layout: {layout.width_in}\" x {layout.height_in}\" | one front + one back, centered",
             use_container_width=True,
         )
         sheet_w, sheet_h = sheet.size
         st.caption(f"Sheet: {sheet_w:,} x {sheet_h:,} px @ {dpi} DPI")
 
-        sheet_buffer = io.BytesIO()
-        sheet.save(sheet_buffer, format="JPEG", quality=95)
-        sheet_buffer.seek(0)
+        sheet_jpeg = encode_jpeg_bytes(cv2.cvtColor(np.asarray(sheet), cv2.COLOR_RGB2BGR))
         st.download_button(
             label="Download page",
-            data=sheet_buffer,
+            data=sheet_jpeg,
             file_name="id_card_front_back.jpg",
             mime="image/jpeg",
             use_container_width=True,
@@ -1307,7 +1475,10 @@ with st.sidebar:
     
     if document_type == "Passport / Visa photo":
         with st.expander("About Countries", expanded=False):
-            for code, spec in specs.items():
-                st.write(f"**{code}** - {spec.name}")
-                st.write(f"Size: {spec.width_in}\" x {spec.height_in}\"")
+            st.markdown(
+                "\n\n".join(
+                    f"**{code}** - {spec.name}  \nSize: {spec.width_in}\" x {spec.height_in}\""
+                    for code, spec in specs.items()
+                )
+            )
 
@@ -0,0 +1,61 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from process_photo import _alpha_composite, _border_connected_region
+
+
+class BorderConnectedRegionTests(unittest.TestCase):
+    def test_keeps_only_regions_touching_the_border(self):
+        candidate = np.zeros((60, 80), dtype=np.uint8)
+        candidate[:, :10] = 255  # touches the left edge
+        candidate[25:35, 35:45] = 255  # isolated interior blob
+        candidate[50:, 70:] = 255  # touches the bottom-right corner
+
+        region = _border_connected_region(candidate)
+
+        expected = candidate.copy()
+        expected[25:35, 35:45] = 0
+        np.testing.assert_array_equal(region, expected)
+
+    def test_matches_connected_components_border_labels(self):
+        rng = np.random.default_rng(0)
+        candidate = (rng.random((90, 70)) > 0.55).astype(np.uint8) * 255
+
+        _, labels = cv2.connectedComponents(candidate)
+        border_labels = set(np.unique(np.concatenate([labels[0], labels[-1], labels[:, 0], labels[:, -1]])))
+        border_labels.discard(0)
+        expected = np.isin(labels, list(border_labels)).astype(np.uint8) * 255
+
+        np.testing.assert_array_equal(_border_connected_region(candidate), expected)
+
+    def test_returns_none_without_border_contact(self):
+        candidate = np.zeros((40, 40), dtype=np.uint8)
+        candidate[10:20, 10:20] = 255
+        self.assertIsNone(_border_connected_region(candidate))
+
+
+class AlphaCompositeTests(unittest.TestCase):
+    def _reference(self, image_bgr, background_rgb, alpha):
+        a = alpha[:, :, None].astype(np.uint16)
+        bg = np.array(background_rgb[::-1], dtype=np.uint16)
+        return ((image_bgr.astype(np.uint16) * a + bg * (255 - a)) // 255).astype(np.uint8)
+
+    def test_matches_dense_blend_for_hard_and_soft_masks(self):
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 256, (80, 60, 3), dtype=np.uint8)
+        hard = np.zeros((80, 60), dtype=np.uint8)
+        cv2.ellipse(hard, (30, 40), (18, 26), 0, 0, 360, 255, -1)
+        feathered = cv2.GaussianBlur(hard, (7, 7), 2.0)
+        noisy = rng.integers(0, 256, (80, 60), dtype=np.uint8)
+
+        for alpha in (hard, feathered, noisy):
+            np.testing.assert_array_equal(
+                _alpha_composite(image, (10, 120, 250), alpha),
+                self._reference(image, (10, 120, 250), alpha),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+import unittest
+from pathlib import Path
+
+from process_photo import _batch_output_prefixes
+
+
+class BatchOutputPrefixTests(unittest.TestCase):
+    def test_distinct_stems_keep_their_names(self):
+        prefixes = _batch_output_prefixes([Path("a.jpg"), Path("b.png")], "us")
+        self.assertEqual(prefixes, ["a_us", "b_us"])
+
+    def test_inputs_sharing_a_stem_get_unique_prefixes(self):
+        paths = [Path("a.jpg"), Path("a.png"), Path("d1/a.jpg"), Path("a.jpg"), Path("A.JPG"), Path("a-2.jpg")]
+        prefixes = _batch_output_prefixes(paths, "us")
+        self.assertEqual(prefixes[:2], ["a_us", "a-2_us"])
+        self.assertEqual(len({p.lower() for p in prefixes}), len(paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from process_photo import PhotoSpec, _scaled_crop, _spec_targets, crop_to_spec, crop_with_padding
+
+
+class ScaledCropTests(unittest.TestCase):
+    def setUp(self):
+        # Smooth gradient so a sub-pixel phase difference stays small.
+        ys, xs = np.mgrid[0:400, 0:300]
+        self.image = np.dstack([xs * 255 // 300, ys * 255 // 400, (xs + ys) * 255 // 700]).astype(np.uint8)
+
+    def _full_frame(self, scale, left, top, width, height, background_rgb):
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        resized = cv2.resize(self.image, None, fx=scale, fy=scale, interpolation=interpolation)
+        return crop_with_padding(resized, left, top, width, height, background_rgb)
+
+    def test_matches_full_frame_resize_inside_image(self):
+        for scale, left, top in ((0.37, 20, 30), (1.6, 150, 200)):
+            expected = self._full_frame(scale, left, top, 80, 100, (255, 255, 255)).astype(int)
+            actual = _scaled_crop(self.image, scale, left, top, 80, 100, (255, 255, 255)).astype(int)
+            self.assertEqual(actual.shape, expected.shape)
+            self.assertLess(np.abs(actual - expected).mean(), 1.5)
+
+    def test_pads_windows_that_overhang_the_image(self):
+        crop = _scaled_crop(self.image, 0.5, -20, -10, 60, 60, (10, 20, 30))
+        self.assertEqual(crop.shape, (60, 60, 3))
+        self.assertTrue((crop[:10] == (10, 20, 30)).all())
+        self.assertTrue((crop[:, :20] == (10, 20, 30)).all())
+        self.assertFalse((crop[10:, 20:] == (10, 20, 30)).all())
+
+    def test_window_outside_image_is_all_background(self):
+        crop = _scaled_crop(self.image, 0.5, 500, 500, 40, 30, (1, 2, 3))
+        self.assertEqual(crop.shape, (30, 40, 3))
+        self.assertTrue((crop == (1, 2, 3)).all())
+
+
+class CropToSpecTests(unittest.TestCase):
+    def test_unscaled_crop_does_not_alias_the_source(self):
+        spec = PhotoSpec("Test", 1.0, 1.0, 0.5, 0.6, (255, 255, 255), 0.1)
+        targets = _spec_targets(spec, 100)
+        image = np.random.default_rng(0).integers(0, 256, (400, 400, 3), dtype=np.uint8)
+        # Face box sized so the head already matches the target: scale snaps to 1.0.
+        box_h = int(round(targets.target_head_height / 1.15))
+        crop = crop_to_spec(image, (180, 180, box_h, box_h), (200, 200), spec, 100)
+
+        self.assertEqual(crop.shape, (targets.out_h, targets.out_w, 3))
+        self.assertFalse(np.shares_memory(crop, image))
+        self.assertTrue(crop.flags["C_CONTIGUOUS"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from photo_service import decode_image_bytes, encode_jpeg_bytes
+
+
+def _encode(ext: str, image: np.ndarray) -> bytes:
+    ok, encoded = cv2.imencode(ext, image)
+    assert ok
+    return encoded.tobytes()
+
+
+class DecodeImageBytesTests(unittest.TestCase):
+    def setUp(self):
+        ys, xs = np.mgrid[0:800, 0:1200]
+        self.image = np.dstack([xs % 256, ys % 256, (xs + ys) % 256]).astype(np.uint8)
+
+    def test_decodes_full_size_by_default(self):
+        decoded = decode_image_bytes(_encode(".jpg", self.image))
+        self.assertEqual(decoded.shape, (800, 1200, 3))
+
+    def test_shrinks_jpeg_on_load_while_keeping_min_side(self):
+        jpeg = _encode(".jpg", self.image)
+        self.assertEqual(decode_image_bytes(jpeg, min_side=300).shape, (400, 600, 3))
+        self.assertEqual(decode_image_bytes(jpeg, min_side=150).shape, (200, 300, 3))
+        self.assertEqual(decode_image_bytes(jpeg, min_side=100).shape, (100, 150, 3))
+        self.assertEqual(decode_image_bytes(jpeg, min_side=500).shape, (800, 1200, 3))
+
+    def test_png_is_never_reduced(self):
+        decoded = decode_image_bytes(_encode(".png", self.image), min_side=50)
+        np.testing.assert_array_equal(decoded, self.image)
+
+
+class EncodeJpegBytesTests(unittest.TestCase):
+    def test_round_trips_through_decode(self):
+        image = np.full((60, 40, 3), (30, 120, 220), dtype=np.uint8)
+        jpeg = encode_jpeg_bytes(image)
+        self.assertTrue(jpeg.startswith(b"\xff\xd8"))
+        decoded = decode_image_bytes(jpeg)
+        self.assertEqual(decoded.shape, image.shape)
+        self.assertLessEqual(int(np.abs(decoded.astype(int) - image).max()), 3)
+
+    def test_writes_progressive_jpeg(self):
+        jpeg = encode_jpeg_bytes(np.zeros((32, 32, 3), dtype=np.uint8))
+        self.assertIn(b"\xff\xc2", jpeg)  # SOF2: progressive DCT frame
+
+
+if __name__ == "__main__":
+    unittest.main()
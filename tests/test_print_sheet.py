@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+from print_sheet import LayoutSpec, build_print_sheet_array
+
+
+class PrintSheetTilingTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.photo_rgb = (rng.random((120, 90, 3)) * 200).astype(np.uint8)
+
+    def test_draws_guides_at_grid_positions(self):
+        sheet = build_print_sheet_array(
+            self.photo_rgb, LayoutSpec(6, 4), dpi=100, margin_in=0.1, spacing_in=0.1, copies=5, draw_guides=True
+        )
+        # Same 5x3 grid as below: the first photo spans x 55..144, y 10..129.
+        self.assertEqual(tuple(sheet[10, 60]), (242, 242, 242))  # top outline
+        self.assertEqual(tuple(sheet[60, 144]), (242, 242, 242))  # right outline
+        for y, x in ((10, 55), (14, 55), (10, 59), (129, 140), (125, 144)):
+            self.assertEqual(tuple(sheet[y, x]), (232, 232, 232))  # corner marks
+        self.assertEqual(tuple(sheet[15, 55]), (242, 242, 242))  # past the corner arm
+        # Cut lines sit mid-gap and span the whole grid, including empty cells.
+        self.assertEqual(tuple(sheet[60, 150]), (238, 238, 238))
+        self.assertEqual(tuple(sheet[300, 150]), (238, 238, 238))
+        self.assertEqual(tuple(sheet[135, 545]), (238, 238, 238))
+        self.assertEqual(tuple(sheet[60, 147]), (255, 255, 255))
+        np.testing.assert_array_equal(sheet[11:129, 60:140], self.photo_rgb[1:-1, 5:85])
+
+    def test_clips_guides_of_overhanging_photo(self):
+        tall = np.resize(self.photo_rgb, (110, 100, 3))
+        sheet = build_print_sheet_array(tall, LayoutSpec(1, 1), dpi=100, margin_in=0, spacing_in=0, copies=1)
+        # A 100x110 photo on a 100x100 sheet is centered 5 px above the top edge:
+        # only the side outlines land on the sheet, with the top and bottom clipped.
+        np.testing.assert_array_equal(sheet[:, [0, 99]], np.full((100, 2, 3), 242, dtype=np.uint8))
+        np.testing.assert_array_equal(sheet[:, 1:99], tall[5:105, 1:99])
+
+    def test_later_copies_cover_earlier_outlines_when_overlapping(self):
+        photo = self.photo_rgb[:50, :50]
+        sheet = build_print_sheet_array(photo, LayoutSpec(1, 1), dpi=100, margin_in=0, spacing_in=-0.1, copies=4)
+        # 50 px photos stepped 40 px apart: the second copy (x 45..94) is pasted
+        # over the right outline of the first (x 54), away from any guide mark.
+        np.testing.assert_array_equal(sheet[20, 54], photo[15, 9])
+        self.assertEqual(tuple(sheet[20, 94]), (242, 242, 242))
+
+    def test_rejects_spacing_that_folds_the_grid(self):
+        with self.assertRaises(ValueError):
+            build_print_sheet_array(self.photo_rgb, LayoutSpec(6, 4), dpi=100, spacing_in=-0.9)
+
+    def test_places_requested_copies_on_grid(self):
+        sheet = build_print_sheet_array(
+            self.photo_rgb, LayoutSpec(6, 4), dpi=100, margin_in=0.1, spacing_in=0.1, copies=5, draw_guides=False
+        )
+        # 6x4 at 100 DPI with 10 px margin/spacing fits a 5x3 grid of upright 90x120
+        # photos, centered horizontally: left = 10 + (580 - 490) // 2.
+        left, top = 55, 10
+        placed = []
+        for idx in range(15):
+            row, col = divmod(idx, 5)
+            x, y = left + col * 100, top + row * 130
+            placed.append(np.array_equal(sheet[y : y + 120, x : x + 90], self.photo_rgb))
+        self.assertEqual(placed, [True] * 5 + [False] * 10)
+
+    def test_rotates_photo_when_rotation_fits_more_copies(self):
+        wide = np.zeros((100, 300, 3), dtype=np.uint8)
+        wide[:, :10] = 50  # marks the photo's left edge
+        sheet = build_print_sheet_array(wide, LayoutSpec(4, 6), dpi=100, margin_in=0, spacing_in=0, copies=1, draw_guides=False)
+        # Six upright 300x100 copies fit versus eight rotated 100x300 ones; the
+        # counter-clockwise rotation moves the marked left edge to the bottom.
+        tile = sheet[0:300, 0:100]
+        np.testing.assert_array_equal(tile, np.rot90(wide))
+        self.assertTrue((tile[-10:] == 50).all())
+
+
+if __name__ == "__main__":
+    unittest.main()